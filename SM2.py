@@ -1,26 +1,76 @@
 import random
-from math import gcd, ceil, log
-from gmssl import sm3
+import secrets
+from math import gcd
+from SM2_sm3 import sm3_digest, sm3_new
+from SM2_curve import CurveEngine
+from SM2_params import SM2_EXAMPLE
+from SM2_cache import LRUCache
 
-class SM2:
-    def __init__(self):
-        # 椭圆曲线系统参数
-        self.p = 0x8542D69E4C044F18E8B92435BF6FF7DE457283915C45517D722EDB8B08F1DFC3
-        self.a = 0x787968B4FA32C3FD2417842E73BBFEFF2F3C848B6831D7E0EC65228B3937E498
-        self.b = 0x63E4C6D3B23B0C849CF84241484BFE48F61D59A5B16BA06E6E12D1DA27C5249A
-        self.h = 1
-        self.Gx = 0x421DEBD61B62EAB6746434EBC3CC315E32220B3BADD50BDC4C4E6C147FEDD43D
-        self.Gy = 0x0680512BCBB42C07D47349D2153B70C4E5D7FDFCBFA36EA1A85841B9E46E09A2
-        self.n = 0x8542D69E4C044F18E8B92435BF6FF7DD297720630485628D5AE74EE7C32E79B7
-        
-        # 接收方B的公私钥
-        self.PBx = 0x435B39CCA8F3B508C1488AFC67BE491A0F7BA07E581A0E4849A5CF70628A7E0A
-        self.PBy = 0x75DDBA78F15FEECB4C7895E2C1CDF5FE01DEBB2CDBADF45399CCF77BBA076A42
-        self.dB = 0x1649AB77A00637BD5E2EFE283FBF353534AA7F7CB89463F208DDBC2920BB0DA0
-        
-        # 计算域元素字节长度
-        self.t = ceil(log(self.p, 2))
-        self.l = ceil(self.t / 8)
+class KeyStream:
+    """按需从KDF分组中取出任意长度的密钥流，并与数据异或"""
+    def __init__(self, blocks):
+        self._blocks = blocks
+        self._pending = b''
+        self.nonzero = False  # 目前为止取出的密钥流是否出现过非零字节
+    
+    def xor(self, data):
+        """数据与接下来len(data)字节的密钥流异或"""
+        n = len(data)
+        parts = [self._pending]
+        need = n - len(self._pending)
+        if need > 0:
+            parts.extend(next(self._blocks) for _ in range((need + 31) // 32))
+        key = b''.join(parts)
+        self._pending = key[n:]
+        key = key[:n]
+        if not self.nonzero and any(key):
+            self.nonzero = True
+        return (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+class SM2(CurveEngine):
+    STREAM_CHUNK = 64 * 1024  # 流式加解密每次读取的字节数
+    
+    def __init__(self, *, constant_time=False, point_cache_size=1024, field_backend=None, curve=None,
+                 key_pair=None):
+        # 椭圆曲线系统参数（见SM2_params）
+        self.setup_curve(curve)
+        
+        # 秘密标量乘法是否使用Montgomery阶梯
+        self.constant_time = constant_time
+        
+        # 压缩点解压缓存：编码 -> 点
+        self.point_cache = LRUCache(point_cache_size)
+        
+        # 域运算后端（见SM2_field），为None时自动选择
+        self.setup_field(field_backend)
+        
+        # 接收方B的公私钥 key_pair = (dB, PB)；未给出时示例曲线使用标准示例数据，
+        # 其他曲线没有默认密钥，加解密时需要显式传入public_key / private_key
+        if key_pair is not None:
+            self.dB = key_pair[0]
+            self.PBx, self.PBy = key_pair[1]
+        elif self.curve == SM2_EXAMPLE:
+            self.PBx = 0x435B39CCA8F3B508C1488AFC67BE491A0F7BA07E581A0E4849A5CF70628A7E0A
+            self.PBy = 0x75DDBA78F15FEECB4C7895E2C1CDF5FE01DEBB2CDBADF45399CCF77BBA076A42
+            self.dB = 0x1649AB77A00637BD5E2EFE283FBF353534AA7F7CB89463F208DDBC2920BB0DA0
+        else:
+            self.dB = self.PBx = self.PBy = None
+    
+    def recipient_public_key(self, public_key=None):
+        """加密用的接收方公钥：给出public_key时用它，否则用self.PBx, self.PBy"""
+        if public_key is not None:
+            return tuple(public_key)
+        if self.PBx is None:
+            raise ValueError("未指定接收方公钥")
+        return (self.PBx, self.PBy)
+    
+    def recipient_private_key(self, private_key=None):
+        """解密用的接收方私钥：给出private_key时用它，否则用self.dB"""
+        if private_key is not None:
+            return private_key
+        if self.dB is None:
+            raise ValueError("未指定接收方私钥")
+        return self.dB
     
     def int_to_bytes(self, x, k):
         """整数转字节串"""
@@ -40,46 +90,49 @@ class SM2:
         """字节串转域元素"""
         return self.bytes_to_int(M)
     
-    def point_to_bytes(self, P):
-        """点转字节串（未压缩形式）"""
-        xp, yp = P
-        x_bytes = self.fielde_to_bytes(xp)
-        y_bytes = self.fielde_to_bytes(yp)
-        return b'\x04' + x_bytes + y_bytes
+    def point_to_bytes(self, P, form='uncompressed'):
+        """点转字节串（form: 'uncompressed' / 'compressed' / 'hybrid'）"""
+        return self.encode_point(P, form)
     
     def bytes_to_point(self, s):
-        """字节串转点"""
-        if len(s) % 2 == 0 or s[0] != 4:
-            raise ValueError("无效的点表示")
-        l = (len(s) - 1) // 2
-        x = self.bytes_to_fielde(s[1:1+l])
-        y = self.bytes_to_fielde(s[1+l:1+2*l])
-        return (x, y)
+        """字节串转点（支持未压缩、压缩、混合形式）"""
+        return self.decode_point(s)
     
     def fielde_to_bits(self, a):
         """域元素转比特串"""
         return bin(a)[2:].zfill(self.t)
     
     def kdf(self, Z, klen):
-        """密钥派生函数"""
+        """密钥派生函数（返回klen比特的比特串）"""
+        t = self.kdf_bytes(Z, (klen + 7) // 8)
+        return bin(int.from_bytes(t, 'big'))[2:].zfill(len(t) * 8)[:klen]
+    
+    def kdf_stream(self, Z):
+        """
+        密钥派生函数（流式）
+        依次产生 Hash(Z ∥ ct) 的32字节分组，ct = 1, 2, ...
+        Z前缀的SM3状态只计算一次，每个计数器值在它的副本上继续哈希
+        """
+        prefix = sm3_new(Z)
+        for ct in range(1, pow(2, 32)):
+            h = prefix.copy()
+            h.update(ct.to_bytes(4, byteorder='big'))
+            yield h.digest()
+    
+    def kdf_bytes(self, Z, length):
+        """密钥派生函数（返回length字节的字节串）"""
         v = 256  # SM3输出长度
-        if klen >= (pow(2, 32) - 1) * v:
+        if length * 8 >= (pow(2, 32) - 1) * v:
             raise ValueError("klen过大")
         
-        ct = 1
-        l = ceil(klen / v)
-        Ha = []
-        
-        for _ in range(l):
-            s = Z + ct.to_bytes(4, byteorder='big')
-            s_list = list(s)
-            hash_hex = sm3.sm3_hash(s_list)
-            hash_bin = bin(int(hash_hex, 16))[2:].zfill(256)
-            Ha.append(hash_bin)
-            ct += 1
-        
-        k = ''.join(Ha)[:klen]
-        return k
+        blocks = []
+        size = 0
+        for block in self.kdf_stream(Z):
+            blocks.append(block)
+            size += len(block)
+            if size >= length:
+                break
+        return b''.join(blocks)[:length]
     
     def mod_inverse(self, a, m):
         """模逆计算"""
@@ -87,50 +140,10 @@ class SM2:
             return None
         return pow(a, -1, m)
     
-    def point_add(self, P, Q):
-        """椭圆曲线点加"""
-        if P == 0: return Q
-        if Q == 0: return P
-        x1, y1 = P
-        x2, y2 = Q
-        
-        if x1 == x2:
-            if y1 != y2:
-                return 0  # 无穷远点
-            return self.point_double(P)
-        
-        l = ((y2 - y1) * self.mod_inverse(x2 - x1, self.p)) % self.p
-        x3 = (l*l - x1 - x2) % self.p
-        y3 = (l*(x1 - x3) - y1) % self.p
-        return (x3, y3)
-    
-    def point_double(self, P):
-        """椭圆曲线二倍点"""
-        if P == 0: return P
-        x1, y1 = P
-        l = ((3*x1*x1 + self.a) * self.mod_inverse(2*y1, self.p)) % self.p
-        x3 = (l*l - 2*x1) % self.p
-        y3 = (l*(x1 - x3) - y1) % self.p
-        return (x3, y3)
-    
     def point_mult(self, k, P):
         """椭圆曲线多倍点计算"""
-        Q = 0  # 无穷远点
-        bits = bin(k)[2:]
-        
-        for bit in bits:
-            Q = self.point_double(Q)
-            if bit == '1':
-                Q = self.point_add(Q, P)
-        return Q
-    
-    def on_curve(self, P):
-        """验证点是否在椭圆曲线上"""
-        if P == 0: return True
-        x, y = P
-        left = (y * y) % self.p
-        right = (x*x*x + self.a*x + self.b) % self.p
-        return left == right
+        # 在Jacobian坐标下完成全部倍点和点加，最后只做一次模逆
+        return self.from_jacobian(self.jacobian_mult(k, P))
     
     def encrypt(self, message):
         """SM2加密算法"""
@@ -139,40 +152,40 @@ class SM2:
         print(f"生成随机数k: {hex(k)}")
         
         # 步骤A2：计算椭圆曲线点C1=[k]G
-        C1 = self.point_mult(k, (self.Gx, self.Gy))
+        C1 = self.secret_mult(k, (self.Gx, self.Gy))
         print(f"C1点坐标: ({hex(C1[0])}, {hex(C1[1])})")
         
         # 步骤A3：计算椭圆曲线点S = [h]PB
-        PB = (self.PBx, self.PBy)
+        PB = self.recipient_public_key()
         S = self.point_mult(self.h, PB)
         if S == 0:
             raise ValueError("S是无穷远点")
         
         # 步骤A4：计算椭圆曲线点[k]PB
-        P2 = self.point_mult(k, PB)
+        P2 = self.secret_mult(k, PB)
         x2, y2 = P2
         
         # 步骤A5：计算t=KDF(x2 ∥ y2, klen)
-        klen = len(message) * 8  # 明文比特长度
+        M_bytes = message.encode('ascii')
+        klen = len(M_bytes) * 8  # 明文比特长度
         Z = x2.to_bytes(self.l, 'big') + y2.to_bytes(self.l, 'big')
-        t = self.kdf(Z, klen)
-        if int(t, 2) == 0:
+        t = self.kdf_bytes(Z, len(M_bytes))
+        if not any(t):
             raise ValueError("KDF生成了全零串")
         
         # 步骤A6：计算C2 = M ⊕ t
-        M_int = int.from_bytes(message.encode('ascii'), 'big')
-        t_int = int(t, 2)
+        M_int = int.from_bytes(M_bytes, 'big')
+        t_int = int.from_bytes(t, 'big')
         C2 = M_int ^ t_int
         
         # 步骤A7：计算C3 = Hash(x2 ∥ M ∥ y2)
-        M_bytes = message.encode('ascii')
         hash_input = x2.to_bytes(self.l, 'big') + M_bytes + y2.to_bytes(self.l, 'big')
-        C3 = sm3.sm3_hash(list(hash_input))
+        C3 = sm3_digest(hash_input)
         
         # 步骤A8：输出密文C = C1 ∥ C2 ∥ C3
         C1_bytes = self.point_to_bytes(C1)
         C2_bytes = C2.to_bytes((klen + 7) // 8, 'big')
-        C3_bytes = bytes.fromhex(C3)
+        C3_bytes = C3
         
         ciphertext = C1_bytes + C2_bytes + C3_bytes
         return ciphertext.hex()
@@ -182,7 +195,7 @@ class SM2:
         cipher_bytes = bytes.fromhex(ciphertext)
         
         # 步骤B1：从C中取出C1并验证
-        C1_len = 1 + 2 * self.l
+        C1_len = self.encoded_point_length(cipher_bytes[0])
         C1_bytes = cipher_bytes[:C1_len]
         C1 = self.bytes_to_point(C1_bytes)
         if not self.on_curve(C1):
@@ -194,34 +207,241 @@ class SM2:
             raise ValueError("S是无穷远点")
         
         # 步骤B3：计算[dB]C1=(x2,y2)
-        P2 = self.point_mult(self.dB, C1)
+        P2 = self.secret_mult(self.recipient_private_key(), C1)
         x2, y2 = P2
         
         # 步骤B4：计算t=KDF(x2 ∥ y2, klen)
         C3_len = 32  # SM3哈希长度
         C2_len = len(cipher_bytes) - C1_len - C3_len
-        klen = C2_len * 8
         Z = x2.to_bytes(self.l, 'big') + y2.to_bytes(self.l, 'big')
-        t = self.kdf(Z, klen)
-        if int(t, 2) == 0:
+        t = self.kdf_bytes(Z, C2_len)
+        if not any(t):
             raise ValueError("KDF生成了全零串")
         
         # 步骤B5：计算M′ = C2 ⊕ t
         C2_bytes = cipher_bytes[C1_len:C1_len+C2_len]
         C2_int = int.from_bytes(C2_bytes, 'big')
-        t_int = int(t, 2)
+        t_int = int.from_bytes(t, 'big')
         M_prime_int = C2_int ^ t_int
         M_prime = M_prime_int.to_bytes(C2_len, 'big').decode('ascii', errors='replace')
         
         # 步骤B6：验证u = Hash(x2 ∥ M′ ∥ y2) 是否等于 C3
         M_prime_bytes = M_prime.encode('ascii')
         hash_input = x2.to_bytes(self.l, 'big') + M_prime_bytes + y2.to_bytes(self.l, 'big')
-        u = sm3.sm3_hash(list(hash_input))
+        u = sm3_digest(hash_input)
         C3_bytes = cipher_bytes[-C3_len:]
-        if u != C3_bytes.hex():
+        if u != C3_bytes:
             raise ValueError("C3验证失败")
         
         return M_prime
+    
+    def encrypt_bytes(self, message, mode='C1C2C3', point_form='uncompressed', public_key=None):
+        """
+        SM2加密算法（字节串接口）
+        参数:
+            message: 明文 (bytes / bytearray / memoryview)
+            mode: 密文排列方式，'C1C2C3' 或 'C1C3C2'
+            point_form: C1的编码形式，见point_to_bytes
+            public_key: 接收方公钥 (元组 (x, y))，为None时使用self.PBx, self.PBy
+        返回:
+            密文 (bytes)
+        """
+        if mode not in ('C1C2C3', 'C1C3C2'):
+            raise ValueError("不支持的密文格式")
+        if len(message) == 0:
+            raise ValueError("明文不能为空")
+        
+        PB = self.recipient_public_key(public_key)
+        if self.point_mult(self.h, PB) == 0:
+            raise ValueError("S是无穷远点")
+        while True:
+            # 步骤A1-A4：生成k，计算C1 = [k]G 和 [k]PB = (x2, y2)
+            k = secrets.randbelow(self.n - 1) + 1
+            C1 = self.secret_mult(k, (self.Gx, self.Gy))
+            x2, y2 = self.secret_mult(k, PB)
+            x2_bytes = x2.to_bytes(self.l, 'big')
+            y2_bytes = y2.to_bytes(self.l, 'big')
+            
+            # 步骤A5-A6：C2 = M ⊕ KDF(x2 ∥ y2, klen)，密钥流全零时重新选择k
+            stream = KeyStream(self.kdf_stream(x2_bytes + y2_bytes))
+            C2 = stream.xor(message)
+            if stream.nonzero:
+                break
+        
+        # 步骤A7：计算C3 = Hash(x2 ∥ M ∥ y2)
+        h = sm3_new(x2_bytes)
+        h.update(message)
+        h.update(y2_bytes)
+        C3 = h.digest()
+        
+        # 步骤A8：按指定格式输出密文
+        C1_bytes = self.point_to_bytes(C1, point_form)
+        if mode == 'C1C3C2':
+            return C1_bytes + C3 + C2
+        return C1_bytes + C2 + C3
+    
+    def decrypt_bytes(self, ciphertext, mode='C1C2C3', private_key=None):
+        """
+        SM2解密算法（字节串接口）
+        参数:
+            ciphertext: 密文 (bytes / bytearray / memoryview)
+            mode: 密文排列方式，'C1C2C3' 或 'C1C3C2'
+            private_key: 接收方私钥 (整数)，为None时使用self.dB
+        返回:
+            明文 (bytes)
+        """
+        if mode not in ('C1C2C3', 'C1C3C2'):
+            raise ValueError("不支持的密文格式")
+        view = memoryview(ciphertext)
+        if len(view) == 0:
+            raise ValueError("密文长度不足")
+        C1_len = self.encoded_point_length(view[0])
+        C3_len = 32  # SM3哈希长度
+        if len(view) <= C1_len + C3_len:
+            raise ValueError("密文长度不足")
+        
+        # 步骤B1：从C中取出C1并验证
+        C1 = self.bytes_to_point(view[:C1_len])
+        if not self.on_curve(C1):
+            raise ValueError("C1不在椭圆曲线上")
+        if mode == 'C1C3C2':
+            C3 = view[C1_len:C1_len + C3_len]
+            C2 = view[C1_len + C3_len:]
+        else:
+            C2 = view[C1_len:-C3_len]
+            C3 = view[-C3_len:]
+        
+        # 步骤B2-B3：计算S=[h]C1，[dB]C1=(x2,y2)
+        if self.point_mult(self.h, C1) == 0:
+            raise ValueError("S是无穷远点")
+        x2, y2 = self.secret_mult(self.recipient_private_key(private_key), C1)
+        x2_bytes = x2.to_bytes(self.l, 'big')
+        y2_bytes = y2.to_bytes(self.l, 'big')
+        
+        # 步骤B4-B5：计算M′ = C2 ⊕ KDF(x2 ∥ y2, klen)
+        stream = KeyStream(self.kdf_stream(x2_bytes + y2_bytes))
+        M_prime = stream.xor(C2)
+        if not stream.nonzero:
+            raise ValueError("KDF生成了全零串")
+        
+        # 步骤B6：验证u = Hash(x2 ∥ M′ ∥ y2) 是否等于 C3
+        h = sm3_new(x2_bytes)
+        h.update(M_prime)
+        h.update(y2_bytes)
+        if h.digest() != C3:
+            raise ValueError("C3验证失败")
+        return M_prime
+    
+    def encrypt_stream(self, reader, writer, chunk_size=None, point_form='uncompressed',
+                       public_key=None):
+        """
+        SM2流式加密
+        从reader读取明文，向writer写出密文 C1 ∥ C2 ∥ C3，
+        C2逐块异或KDF密钥流，C3 = Hash(x2 ∥ M ∥ y2)增量计算，内存占用与明文长度无关
+        参数:
+            reader: 提供read(n)的明文来源（字节）
+            writer: 提供write(b)的密文去向（字节）
+            chunk_size: 每次读取的字节数，默认STREAM_CHUNK
+            point_form: C1的编码形式，见point_to_bytes
+            public_key: 接收方公钥 (元组 (x, y))，为None时使用self.PBx, self.PBy
+        返回:
+            明文字节数
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK
+        # 先读第一块，明文为空时在写出C1之前报错
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            raise ValueError("明文不能为空")
+        
+        # 步骤A1-A4：生成k，计算C1 = [k]G 和 [k]PB = (x2, y2)
+        PB = self.recipient_public_key(public_key)
+        if self.point_mult(self.h, PB) == 0:
+            raise ValueError("S是无穷远点")
+        k = secrets.randbelow(self.n - 1) + 1
+        C1 = self.secret_mult(k, (self.Gx, self.Gy))
+        x2, y2 = self.secret_mult(k, PB)
+        x2_bytes = x2.to_bytes(self.l, 'big')
+        y2_bytes = y2.to_bytes(self.l, 'big')
+        writer.write(self.point_to_bytes(C1, point_form))
+        
+        # 步骤A5-A7：边读边异或，同时增量计算C3
+        stream = KeyStream(self.kdf_stream(x2_bytes + y2_bytes))
+        h = sm3_new(x2_bytes)
+        total = 0
+        while chunk:
+            h.update(chunk)
+            writer.write(stream.xor(chunk))
+            total += len(chunk)
+            chunk = reader.read(chunk_size)
+        if not stream.nonzero:
+            raise ValueError("KDF生成了全零串")
+        
+        # 步骤A8：最后写出C3
+        h.update(y2_bytes)
+        writer.write(h.digest())
+        return total
+    
+    def decrypt_stream(self, reader, writer, chunk_size=None, private_key=None):
+        """
+        SM2流式解密
+        从reader读取密文 C1 ∥ C2 ∥ C3，向writer写出明文。
+        注意明文在C3校验之前就已经写出，校验失败时抛出ValueError，调用方应丢弃已写出的内容
+        参数:
+            reader: 提供read(n)的密文来源（字节）
+            writer: 提供write(b)的明文去向（字节）
+            chunk_size: 每次读取的字节数，默认STREAM_CHUNK
+            private_key: 接收方私钥 (整数)，为None时使用self.dB
+        返回:
+            明文字节数
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK
+        C3_len = 32  # SM3哈希长度
+        
+        # 步骤B1-B3：读出C1并验证，计算[dB]C1 = (x2, y2)
+        C1_bytes = reader.read(1)
+        if not C1_bytes:
+            raise ValueError("密文长度不足")
+        C1_len = self.encoded_point_length(C1_bytes[0])
+        while len(C1_bytes) < C1_len:
+            chunk = reader.read(C1_len - len(C1_bytes))
+            if not chunk:
+                raise ValueError("密文长度不足")
+            C1_bytes += chunk
+        C1 = self.bytes_to_point(C1_bytes)
+        if not self.on_curve(C1):
+            raise ValueError("C1不在椭圆曲线上")
+        if self.point_mult(self.h, C1) == 0:
+            raise ValueError("S是无穷远点")
+        x2, y2 = self.secret_mult(self.recipient_private_key(private_key), C1)
+        x2_bytes = x2.to_bytes(self.l, 'big')
+        y2_bytes = y2.to_bytes(self.l, 'big')
+        
+        # 步骤B4-B5：最后C3_len字节是C3，其余部分边读边解密
+        stream = KeyStream(self.kdf_stream(x2_bytes + y2_bytes))
+        h = sm3_new(x2_bytes)
+        tail = b''
+        total = 0
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            data = tail + chunk
+            body, tail = data[:-C3_len], data[-C3_len:]
+            if body:
+                plain = stream.xor(body)
+                h.update(plain)
+                writer.write(plain)
+                total += len(body)
+        if len(tail) != C3_len or total == 0:
+            raise ValueError("密文长度不足")
+        if not stream.nonzero:
+            raise ValueError("KDF生成了全零串")
+        
+        # 步骤B6：验证u = Hash(x2 ∥ M′ ∥ y2) 是否等于 C3
+        h.update(y2_bytes)
+        if h.digest() != tail:
+            raise ValueError("C3验证失败")
+        return total
 
 if __name__ == "__main__":
     print("SM2椭圆曲线公钥密码算法".center(80, '='))
@@ -0,0 +1,318 @@
+"""
+asyncio接口的SM2签名 / 验签服务
+并发到达的请求先进入队列，由后台任务合并成小批量（最多max_batch个，最多等待max_latency秒）
+交给工作进程池执行，验签批量走verify_batch；队列满时调用方在await处等待（背压）。
+serve_unix在本机Unix域套接字上提供同样的服务，协议为每行一个JSON：
+    请求  {"id": 任意, "op": "sign", "message": 十六进制, "private_key": 十六进制,
+           "public_key": 十六进制点编码, "ID": 可选}
+          {"id": 任意, "op": "verify", "message": 十六进制, "signature": 十六进制r ∥ s,
+           "public_key": 十六进制点编码, "ID": 可选}
+    响应  {"id": 同请求, "result": 十六进制签名 或 true/false} 或 {"id": 同请求, "error": 错误信息}
+"""
+import asyncio
+import json
+
+from SM2_encoding import signature_from_raw, signature_to_raw
+from SM2_pool import SM2Pool, worker_signer
+from SM2_signature import SM2
+
+DEFAULT_ID = "ALICE123@YAHOO.COM"
+
+
+def _sign_batch(items, signer=None):
+    """
+    执行一批签名，items为 (message, private_key, public_key, ID) 的列表
+    返回与items一一对应的列表，出错的项放的是异常对象，不影响同批的其他请求
+    """
+    signer = signer or worker_signer()
+    results = []
+    for message, d, P, ID in items:
+        try:
+            results.append(signer.sign(message, d, P, ID))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _verify_batch(items, signer=None):
+    """
+    执行一批验签，items为 (message, signature, public_key, ID) 的列表
+    按公钥排序后交给verify_batch，同一公钥的签名落在同一组里合并计算；
+    整批出错时逐条验证，出错的项放的是异常对象
+    """
+    signer = signer or worker_signer()
+    order = sorted(range(len(items)), key=lambda i: items[i][2])
+    try:
+        results = signer.verify_batch([items[i] for i in order])
+    except Exception:
+        results = []
+        for i in order:
+            try:
+                results.append(signer.verify(*items[i]))
+            except Exception as e:
+                results.append(e)
+    out = [False] * len(items)
+    for i, ok in zip(order, results):
+        out[i] = ok
+    return out
+
+
+class AsyncSM2:
+    """
+    asyncio的SM2签名 / 验签前端
+    用法:
+        async with AsyncSM2(workers=4) as sm2:
+            signature = await sm2.sign(message, d, P)
+            ok = await sm2.verify(message, signature, P)
+    """
+
+    def __init__(self, pool=None, workers=None, max_batch=64, max_latency=0.002,
+                 max_pending=1024, max_inflight=None, curve=None, base_table_path=None):
+        """
+        参数:
+            pool: 已有的SM2Pool；为None且workers不为0时按workers、curve、base_table_path创建，
+                  workers为0时在线程中用本地SM2实例执行（各批量共用同一份缓存）
+            max_batch: 每批最多合并的请求数
+            max_latency: 第一个请求到达后最多等待多少秒凑批
+            max_pending: 每种请求排队的上限，超过时sign / verify在await处等待
+            max_inflight: 同时在执行的批数上限，默认为工作进程数的2倍
+        """
+        self._owned = pool is None and workers != 0
+        if self._owned:
+            pool = SM2Pool(workers=workers, base_table_path=base_table_path, curve=curve)
+        self.pool = pool
+        self.signer = SM2(curve=curve)  # 解析点编码，以及workers为0时直接执行
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.max_pending = max_pending
+        self.max_inflight = max_inflight or 2 * (pool.workers if pool is not None else 1)
+        self._queues = None
+        self._tasks = []
+        self._inflight = None
+
+    def _start(self):
+        if self._queues is None:
+            self._queues = {
+                _sign_batch: asyncio.Queue(self.max_pending),
+                _verify_batch: asyncio.Queue(self.max_pending),
+            }
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+            self._tasks = [asyncio.ensure_future(self._batcher(func, queue))
+                           for func, queue in self._queues.items()]
+
+    async def _submit(self, func, item):
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[func].put((item, future))
+        return await future
+
+    async def sign(self, message, private_key, public_key, ID=DEFAULT_ID):
+        """异步签名，返回 (r, s)"""
+        return await self._submit(_sign_batch, (message, private_key, tuple(public_key), ID))
+
+    async def verify(self, message, signature, public_key, ID=DEFAULT_ID):
+        """异步验签，返回布尔值"""
+        return await self._submit(_verify_batch, (message, tuple(signature), tuple(public_key), ID))
+
+    async def _batcher(self, func, queue):
+        """从队列中凑批并派发"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            try:
+                deadline = loop.time() + self.max_latency
+                while len(batch) < self.max_batch:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._inflight.acquire()
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            asyncio.ensure_future(self._dispatch(func, batch))
+
+    async def _dispatch(self, func, batch):
+        """执行一批请求，把结果分发给各自的future"""
+        try:
+            items = [item for item, _ in batch]
+            if self.pool is not None:
+                results = await asyncio.wrap_future(self.pool.submit(func, items))
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(None, func, items, self.signer)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._inflight.release()
+
+    async def close(self):
+        """停止凑批任务，等待执行中的批量完成，关闭自建的进程池"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queues is not None:
+            # 还在排队的请求不再执行
+            for queue in self._queues.values():
+                while not queue.empty():
+                    queue.get_nowait()[1].cancel()
+            for _ in range(self.max_inflight):
+                await self._inflight.acquire()
+        self._queues = None
+        if self._owned:
+            self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ---------- Unix域套接字服务 ----------
+
+    async def _handle_request(self, request):
+        if request.get('op') == 'sign':
+            r_s = await self.sign(bytes.fromhex(request['message']), int(request['private_key'], 16),
+                                  self.signer.bytes_to_point(bytes.fromhex(request['public_key'])),
+                                  request.get('ID', DEFAULT_ID))
+            return signature_to_raw(r_s, self.signer.l).hex()
+        if request.get('op') == 'verify':
+            signature = signature_from_raw(bytes.fromhex(request['signature']), self.signer.l)
+            return await self.verify(bytes.fromhex(request['message']), signature,
+                                     self.signer.bytes_to_point(bytes.fromhex(request['public_key'])),
+                                     request.get('ID', DEFAULT_ID))
+        raise ValueError("未知的操作")
+
+    async def _serve_line(self, line, writer, limit):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'result': await self._handle_request(request)}
+        except Exception as e:
+            response = {'id': request_id, 'error': str(e)}
+        finally:
+            limit.release()
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+
+    async def _serve_connection(self, reader, writer):
+        limit = asyncio.Semaphore(self.max_pending)  # 单个连接未完成请求的上限
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await limit.acquire()
+                task = asyncio.ensure_future(self._serve_line(line, writer, limit))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_unix(self, path):
+        """
+        在Unix域套接字path上提供服务，协议见模块说明
+        同一连接上的多个请求可以并发，响应按完成顺序返回，用id对应
+        返回:
+            asyncio.Server
+        """
+        return await asyncio.start_unix_server(self._serve_connection, path=path)
+
+
+class SM2Client:
+    """serve_unix服务的客户端"""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._task = asyncio.ensure_future(self._read_responses())
+
+    @classmethod
+    async def connect(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    async def _read_responses(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._waiting.pop(response['id'], None)
+            if future is None or future.done():
+                continue
+            if 'error' in response:
+                future.set_exception(ValueError(response['error']))
+            else:
+                future.set_result(response['result'])
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("连接已关闭"))
+
+    async def _request(self, request):
+        self._next_id += 1
+        request['id'] = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self._writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def sign(self, message, private_key, public_key_bytes, ID=DEFAULT_ID, size=32):
+        """
+        参数:
+            message: 消息 (字节串)
+            public_key_bytes: 公钥的点编码（见point_to_bytes）
+        返回:
+            签名 (r, s)
+        """
+        result = await self._request({'op': 'sign', 'message': message.hex(),
+                                      'private_key': '%x' % private_key,
+                                      'public_key': public_key_bytes.hex(), 'ID': ID})
+        return signature_from_raw(bytes.fromhex(result), size)
+
+    async def verify(self, message, signature, public_key_bytes, ID=DEFAULT_ID, size=32):
+        """返回验签结果 (布尔值)"""
+        return await self._request({'op': 'verify', 'message': message.hex(),
+                                    'signature': signature_to_raw(signature, size).hex(),
+                                    'public_key': public_key_bytes.hex(), 'ID': ID})
+
+    async def close(self):
+        self._writer.close()
+        await self._task
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def main(path):
+        async with AsyncSM2() as sm2:
+            server = await sm2.serve_unix(path)
+            print("SM2服务已启动:", path)
+            async with server:
+                await server.serve_forever()
+
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "/tmp/sm2.sock"))
@@ -0,0 +1,200 @@
+"""
+SM2签名日志审计
+日志文件格式（整数均为大端）:
+    文件头  b'SM2L' ∥ 版本(u32, 当前为1)
+    记录    公钥编号(u32) ∥ 消息长度(u32) ∥ r ∥ s (各32字节) ∥ 消息
+审计时用mmap映射整个文件，只扫描记录头建立按公钥分组的偏移表；
+工作进程各自映射同一文件，按偏移就地解析记录，同一公钥的记录放在一起验证以复用预计算表
+"""
+import mmap
+import os
+import struct
+from array import array
+
+from SM2_pool import SM2Pool, worker_signer
+
+LOG_MAGIC = b'SM2L'
+LOG_VERSION = 1
+_HEADER = struct.Struct('>4sI')
+_RECORD = struct.Struct('>II32s32s')
+
+# 工作进程中已映射的日志文件 {path: ((st_dev, st_ino), file, mmap)}
+_maps = {}
+
+
+def write_log_header(f):
+    """写入日志文件头"""
+    f.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+
+
+def write_record(f, key_id, message, signature):
+    """
+    追加一条记录
+    参数:
+        f: 以二进制方式打开的文件
+        key_id: 公钥编号 (整数)
+        message: 消息 (字符串或字节串)
+        signature: 签名 (r, s)
+    """
+    if isinstance(message, str):
+        message = message.encode('utf-8')
+    r, s = signature
+    f.write(_RECORD.pack(key_id, len(message), r.to_bytes(32, byteorder='big'),
+                         s.to_bytes(32, byteorder='big')))
+    f.write(message)
+
+
+def scan_log(buf):
+    """
+    扫描日志，只读记录头
+    返回:
+        (记录数, {公钥编号: array('Q') 记录偏移}, {公钥编号: array('Q') 记录序号})
+    """
+    if len(buf) < _HEADER.size:
+        raise ValueError("日志文件头不完整")
+    magic, version = _HEADER.unpack_from(buf, 0)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError("不是SM2签名日志或版本不支持")
+    offsets = {}
+    indices = {}
+    unpack = struct.Struct('>II').unpack_from
+    pos = _HEADER.size
+    end = len(buf)
+    count = 0
+    while pos < end:
+        if pos + _RECORD.size > end:
+            raise ValueError("第%d条记录被截断" % count)
+        key_id, length = unpack(buf, pos)
+        if key_id not in offsets:
+            offsets[key_id] = array('Q')
+            indices[key_id] = array('Q')
+        offsets[key_id].append(pos)
+        indices[key_id].append(count)
+        pos += _RECORD.size + length
+        if pos > end:
+            raise ValueError("第%d条记录被截断" % count)
+        count += 1
+    return count, offsets, indices
+
+
+def read_record(buf, offset):
+    """
+    在offset处就地解析一条记录
+    返回:
+        (公钥编号, 消息的memoryview, (r, s))
+    """
+    key_id, length, r, s = _RECORD.unpack_from(buf, offset)
+    start = offset + _RECORD.size
+    message = memoryview(buf)[start:start + length]
+    return key_id, message, (int.from_bytes(r, byteorder='big'), int.from_bytes(s, byteorder='big'))
+
+
+def _log_map(path, stamp):
+    """
+    取得日志文件的映射，stamp = (st_dev, st_ino, 扫描时的长度)
+    只映射扫描过的部分，之后追加的记录不影响审计；文件被替换或截断到扫描长度以下时报错
+    """
+    dev, ino, size = stamp
+    st = os.stat(path)
+    if (st.st_dev, st.st_ino) != (dev, ino) or st.st_size < size:
+        raise ValueError("日志文件在审计期间被替换或截断")
+    if path in _maps and (_maps[path][0] != (dev, ino) or len(_maps[path][2]) < size):
+        _, f, buf = _maps.pop(path)
+        buf.close()
+        f.close()
+    if path not in _maps:
+        f = open(path, 'rb')
+        _maps[path] = ((dev, ino), f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ))
+    return _maps[path][2]
+
+
+def _audit_chunk(args):
+    """工作进程：验证同一公钥的一块记录，返回未通过的记录序号"""
+    path, stamp, public_key, ID, offsets, indices = args
+    buf = _log_map(path, stamp)
+    items = []
+    for offset in offsets:
+        _, message, signature = read_record(buf, offset)
+        items.append((message, signature, public_key, ID))
+    results = worker_signer().verify_batch(items)
+    return [i for i, ok in zip(indices, results) if not ok]
+
+
+def failed_records(bitmap, count):
+    """按序号列出位图中标记为失败的记录"""
+    return [i for i in range(count) if bitmap[i >> 3] >> (i & 7) & 1]
+
+
+def audit_log(path, keys, ids=None, ID="ALICE123@YAHOO.COM", pool=None,
+              workers=None, chunksize=256, base_table_path=None, curve=None):
+    """
+    验证日志文件中的全部签名
+    参数:
+        path: 日志文件路径
+        keys: {公钥编号: 公钥 (x, y)}，找不到公钥的记录视为失败
+        ids: 可选的 {公钥编号: 用户身份标识}，缺省使用ID
+        pool: 已有的SM2Pool，为None时按workers、base_table_path、curve临时创建
+        chunksize: 每个任务包含的记录数（同一公钥）
+    返回:
+        (记录数, 失败位图)；位图第i位（字节i // 8的第i % 8位）为1表示第i条记录验证失败
+    """
+    ids = ids or {}
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            raise ValueError("日志文件为空")
+        # 只审计此刻已有的内容，审计期间追加的记录留到下一次
+        stamp = (st.st_dev, st.st_ino, st.st_size)
+        with mmap.mmap(f.fileno(), st.st_size, access=mmap.ACCESS_READ) as buf:
+            count, offsets, indices = scan_log(buf)
+
+    bitmap = bytearray((count + 7) // 8)
+    tasks = []
+    for key_id, key_offsets in offsets.items():
+        key_indices = indices[key_id]
+        if key_id not in keys:
+            for i in key_indices:
+                bitmap[i >> 3] |= 1 << (i & 7)
+            continue
+        public_key = tuple(keys[key_id])
+        key_ID = ids.get(key_id, ID)
+        for start in range(0, len(key_offsets), chunksize):
+            tasks.append((path, stamp, public_key, key_ID,
+                          key_offsets[start:start + chunksize], key_indices[start:start + chunksize]))
+
+    owned = pool is None
+    if owned:
+        pool = SM2Pool(workers=workers, base_table_path=base_table_path, curve=curve)
+    try:
+        for failed in pool.map(_audit_chunk, tasks):
+            for i in failed:
+                bitmap[i >> 3] |= 1 << (i & 7)
+    finally:
+        if owned:
+            pool.close()
+    return count, bitmap
+
+
+if __name__ == "__main__":
+    import tempfile
+    from SM2_signature import SM2
+
+    sm2 = SM2()
+    keys = dict(enumerate(sm2.generate_keypair() for _ in range(3)))
+    path = os.path.join(tempfile.gettempdir(), "sm2_audit_demo.log")
+    with open(path, 'wb') as f:
+        write_log_header(f)
+        for i in range(60):
+            key_id = i % 3
+            d, P = keys[key_id]
+            message = "record %d" % i
+            signature = sm2.sign(message, d, P)
+            if i in (7, 42):
+                signature = (signature[0], signature[1] ^ 1)  # 篡改两条
+            write_record(f, key_id, message, signature)
+
+    count, bitmap = audit_log(path, {k: P for k, (d, P) in keys.items()})
+    print("记录数:", count)
+    print("失败位图:", bitmap.hex())
+    print("失败记录:", failed_records(bitmap, count))
+    os.remove(path)
@@ -0,0 +1,219 @@
+import argparse
+import json
+import platform
+import secrets
+import sys
+import time
+
+from SM2 import SM2 as SM2Cipher
+from SM2_field import BACKENDS
+from SM2_params import CURVES
+from SM2_signature import SM2
+import SM2_sm3
+
+PAYLOAD_SIZES = (32, 1024, 16384)  # 加解密测试的明文字节数
+KDF_SIZES = (32, 1024)  # KDF测试的输出字节数
+ENGINES = {'fast': False, 'ladder': True}  # 秘密标量乘法引擎 -> constant_time
+
+
+def bench(func, repeat=50):
+    """运行func repeat次，返回每秒运算次数"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return repeat / (time.perf_counter() - start)
+
+
+def measure(func, repeat=50, warmup=3):
+    """
+    逐次计时运行func
+    返回:
+        {'ops': 每秒运算次数, 'mean_us' / 'p50_us' / 'p90_us' / 'p99_us': 单次耗时（微秒）}
+    """
+    for _ in range(warmup):
+        func()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(repeat):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    samples.sort()
+    total = sum(samples)
+
+    def percentile(q):
+        return samples[min(len(samples) - 1, int(q * len(samples)))] / 1000
+
+    return {
+        'ops': repeat * 1e9 / total,
+        'mean_us': total / repeat / 1000,
+        'p50_us': percentile(0.50),
+        'p90_us': percentile(0.90),
+        'p99_us': percentile(0.99),
+    }
+
+
+def bench_cases(curve=None, backend=None, constant_time=False):
+    """
+    构造一组测试项
+    参数:
+        constant_time: 秘密标量是否走Montgomery阶梯（见ENGINES）
+    返回:
+        {测试项名称: 无参函数}
+    """
+    signer = SM2(curve=curve, field_backend=backend, constant_time=constant_time)
+    uncached = SM2(curve=curve, field_backend=backend, za_cache_size=0, constant_time=constant_time)
+    G = (signer.Gx, signer.Gy)
+    d, P = signer.generate_keypair()
+    cipher = SM2Cipher(curve=curve, field_backend=backend, key_pair=(d, P),
+                       constant_time=constant_time)
+    k = secrets.randbelow(signer.n - 1) + 1
+    message = "message digest"
+    signature = signer.sign(message, d, P)
+    batch = [(message + str(i), signer.sign(message + str(i), d, P), P) for i in range(16)]
+    signer.base_table()  # 固定基点表不计入耗时
+    signer.public_key_precomp(P)  # 公钥预计算表同上
+    Z = secrets.token_bytes(64)
+
+    cases = {
+        'secret_mult [k]G': lambda: signer.secret_mult(k, G),
+        'point_mult [k]G': lambda: signer.point_mult(k, G),
+        'point_mult [k]P': lambda: signer.point_mult(k, P),
+        'sign': lambda: signer.sign(message, d, P),
+        'verify': lambda: signer.verify(message, signature, P),
+        'verify_batch x16': lambda: signer.verify_batch(batch),
+        'compute_ZA': lambda: uncached.compute_ZA("ALICE123@YAHOO.COM", P),
+    }
+    for size in KDF_SIZES:
+        cases['kdf %dB' % size] = lambda size=size: cipher.kdf_bytes(Z, size)
+    for size in PAYLOAD_SIZES:
+        plaintext = secrets.token_bytes(size)
+        ciphertext = cipher.encrypt_bytes(plaintext)
+        cases['encrypt %dB' % size] = lambda m=plaintext: cipher.encrypt_bytes(m)
+        cases['decrypt %dB' % size] = lambda c=ciphertext: cipher.decrypt_bytes(c)
+    return cases
+
+
+def run_suite(repeat=50, curves=None, backends=None, cases=None, engines=None):
+    """
+    对每种 曲线/域运算后端/秘密标量引擎 组合运行全部测试项
+    参数:
+        curves: 曲线名称列表，默认为全部（见SM2_params.CURVES）
+        backends: 域运算后端名称列表，默认为全部可用后端（见SM2_field.BACKENDS）
+        cases: 只运行名称包含其中任一字符串的测试项，默认全部
+        engines: 引擎名称列表，默认为全部（见ENGINES）
+    返回:
+        {'meta': 运行环境, 'results': {'曲线/后端/引擎': {测试项: measure的结果}}}
+    """
+    results = {}
+    for curve in curves or CURVES:
+        for backend in backends or BACKENDS:
+            for engine in engines or ENGINES:
+                config = '%s/%s/%s' % (curve, backend, engine)
+                results[config] = {}
+                for name, func in bench_cases(curve, backend, ENGINES[engine]).items():
+                    if cases and not any(c in name for c in cases):
+                        continue
+                    results[config][name] = measure(func, repeat)
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sm3_backend': SM2_sm3.BACKEND,
+        'repeat': repeat,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    return {'meta': meta, 'results': results}
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    与基线结果比较
+    返回:
+        [(组合, 测试项, 基线ops, 当前ops, 比值)]，只列出比基线慢threshold以上的项
+    """
+    regressions = []
+    for config, cases in report['results'].items():
+        base_cases = baseline['results'].get(config, {})
+        for name, stats in cases.items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            ratio = stats['ops'] / base['ops']
+            if ratio < 1 - threshold:
+                regressions.append((config, name, base['ops'], stats['ops'], ratio))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    """按组合打印结果表，给出基线时附上与基线的比值"""
+    for config, cases in report['results'].items():
+        print(config.center(78, '='))
+        print(f"{'测试项':<19}{'ops/s':>10}{'均值us':>8}{'p50us':>10}{'p90us':>10}{'p99us':>10}"
+              + ("  vs基线" if baseline else ""))
+        base_cases = baseline['results'].get(config, {}) if baseline else {}
+        for name, s in cases.items():
+            line = (f"{name:<22}{s['ops']:>10.1f}{s['mean_us']:>10.1f}{s['p50_us']:>10.1f}"
+                    f"{s['p90_us']:>10.1f}{s['p99_us']:>10.1f}")
+            if name in base_cases:
+                line += f"  {s['ops'] / base_cases[name]['ops']:>6.2f}x"
+            print(line)
+
+
+def bench_secret_mult(repeat=50):
+    """
+    对比秘密标量路径（Montgomery阶梯）与可变时间快速路径的速度
+    返回:
+        {测试项: 每秒运算次数}
+    """
+    fast = SM2()
+    ladder = SM2(constant_time=True)
+    G = (fast.Gx, fast.Gy)
+    d, P = fast.generate_keypair()
+    k = secrets.randbelow(fast.n - 1) + 1
+    message = "message digest"
+    signature = fast.sign(message, d, P)
+    fast.base_table()  # 固定基点表不计入耗时
+    return {
+        '[k]G  阶梯': bench(lambda: ladder.secret_mult(k, G), repeat),
+        '[k]G  快速(固定基点表)': bench(lambda: fast.secret_mult(k, G), repeat),
+        '[k]P  阶梯': bench(lambda: ladder.secret_mult(k, P), repeat),
+        '[k]P  快速': bench(lambda: fast.secret_mult(k, P), repeat),
+        'sign  阶梯': bench(lambda: ladder.sign(message, d, P), repeat),
+        'sign  快速': bench(lambda: fast.sign(message, d, P), repeat),
+        'verify 快速(公开标量)': bench(lambda: fast.verify(message, signature, P), repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SM2性能测试")
+    parser.add_argument('--repeat', type=int, default=50, help="每个测试项的运行次数")
+    parser.add_argument('--curve', action='append', choices=sorted(CURVES), help="只测试指定曲线，可重复")
+    parser.add_argument('--backend', action='append', choices=sorted(BACKENDS), help="只测试指定域运算后端，可重复")
+    parser.add_argument('--engine', action='append', choices=sorted(ENGINES), help="只测试指定秘密标量引擎，可重复")
+    parser.add_argument('--case', action='append', help="只运行名称包含该字符串的测试项，可重复")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    parser.add_argument('--baseline', help="与之比较的基线JSON文件")
+    parser.add_argument('--threshold', type=float, default=0.10, help="判定为性能回退的变慢比例")
+    parser.add_argument('--ladder', action='store_true', help="只对比Montgomery阶梯与快速路径")
+    args = parser.parse_args()
+
+    if args.ladder:
+        print("SM2标量乘法性能对比".center(60, '='))
+        for name, ops in bench_secret_mult(args.repeat).items():
+            print(f"{name:<24}{ops:>10.1f} ops/s")
+        sys.exit(0)
+
+    report = run_suite(args.repeat, args.curve, args.backend, args.case, args.engine)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if baseline:
+        regressions = compare(report, baseline, args.threshold)
+        for config, name, old, new, ratio in regressions:
+            print(f"性能回退: {config} {name}: {old:.1f} -> {new:.1f} ops/s ({ratio:.2f}x)")
+        sys.exit(1 if regressions else 0)
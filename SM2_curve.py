@@ -0,0 +1,635 @@
+from SM2_field import field_backend
+from SM2_params import get_curve
+
+
+class CurveEngine:
+    """
+    椭圆曲线点运算引擎（Jacobian射影坐标）
+    仿射点(x, y)对应Jacobian点(X, Y, Z)，其中x = X/Z^2, y = Y/Z^3，Z = 0表示无穷远点。
+    点加、倍点全程不做模逆，只在标量乘法结束时做一次模逆转回仿射坐标。
+    使用方需要调用setup_curve设置曲线参数、调用setup_field选择域运算后端，
+    并提供压缩点解压缓存 self.point_cache（LRUCache）
+    """
+
+    INFINITY_J = (1, 1, 0)  # Jacobian坐标下的无穷远点
+    BASE_WINDOW = 4  # 固定基点表的窗口宽度（比特）
+    BASE_TABLE_MAGIC = b'SM2T'  # 固定基点表文件头
+    VAR_WINDOW = 4  # 非固定点窗口表的窗口宽度（比特）
+    PRECOMP_SPLIT = 4  # 点预计算时把标量拆成的段数
+    WNAF_WINDOW = 5  # 非固定点wNAF的窗口宽度
+    constant_time = False  # 为True时秘密标量（k、私钥）的乘法走Montgomery阶梯
+    _base_tables = {}  # 按曲线参数缓存的固定基点表，每条曲线只构建一次
+
+    def setup_curve(self, curve=None):
+        """
+        设置曲线参数 self.p, self.a, self.b, self.n, self.h, self.Gx, self.Gy，
+        以及域元素比特长度 self.t、字节长度 self.l
+        参数:
+            curve: CurveParams或曲线名称（见SM2_params），为None时使用示例曲线
+        """
+        curve = get_curve(curve)
+        self.curve = curve
+        self.p, self.a, self.b = curve.p, curve.a, curve.b
+        self.n, self.h = curve.n, curve.h
+        self.Gx, self.Gy = curve.Gx, curve.Gy
+        self.t = self.p.bit_length()
+        self.l = (self.t + 7) // 8
+
+    def setup_field(self, backend=None):
+        """
+        选择域运算后端（见SM2_field），点运算的内部结果都使用该后端的域元素类型，
+        from_jacobian、batch_to_affine等对外返回的坐标仍是Python int
+        参数:
+            backend: 后端名称，为None时使用导入时自动选择的后端
+        """
+        self.field = field_backend(self.p, backend)
+        self.field_a = self.field.element(self.a)
+        # a = -3（如sm2p256v1）时倍点改用 3(X - Z^2)(X + Z^2)，省去a * Z^4
+        self.a_is_minus_3 = self.a == self.p - 3
+
+    def to_jacobian(self, P):
+        """仿射坐标转Jacobian坐标"""
+        if P == 0:
+            return self.INFINITY_J
+        x, y = P
+        return (x, y, 1)
+
+    def from_jacobian(self, J):
+        """Jacobian坐标转仿射坐标（一次模逆）"""
+        X, Y, Z = J
+        if Z == 0:
+            return 0  # 无穷远点
+        field = self.field
+        p = field.p
+        z_inv = field.inverse(Z)
+        z_inv2 = z_inv * z_inv % p
+        return (field.to_int(X * z_inv2 % p), field.to_int(Y * z_inv2 * z_inv % p))
+
+    def batch_to_affine(self, points, as_int=True):
+        """
+        批量Jacobian坐标转仿射坐标
+        使用Montgomery批量求逆技巧，n个点只做一次模逆
+        参数:
+            as_int: 为False时保留域运算后端的元素类型，供内部查表使用
+        """
+        field = self.field
+        p = field.p
+        # 前缀积 prefix[i] = Z_0 * ... * Z_{i-1}（跳过无穷远点）
+        prefix = []
+        acc = 1
+        for X, Y, Z in points:
+            prefix.append(acc)
+            if Z != 0:
+                acc = acc * Z % p
+        inv = field.inverse(acc)
+        result = [0] * len(points)
+        for i in range(len(points) - 1, -1, -1):
+            X, Y, Z = points[i]
+            if Z == 0:
+                continue  # 无穷远点
+            z_inv = inv * prefix[i] % p
+            inv = inv * Z % p
+            z_inv2 = z_inv * z_inv % p
+            result[i] = (X * z_inv2 % p, Y * z_inv2 * z_inv % p)
+        return field.points_to_int(result) if as_int else result
+
+    def field_sqrt(self, v):
+        """
+        有限域F_p上的平方根
+        p ≡ 3 (mod 4)时直接用 v^((p+1)/4)，否则用Tonelli-Shanks算法
+        返回:
+            平方根 (整数)；v不是二次剩余时返回None
+        """
+        p = self.p
+        v %= p
+        if v == 0:
+            return 0
+        if p % 4 == 3:
+            y = pow(v, (p + 1) // 4, p)
+            return y if y * y % p == v else None
+        if pow(v, (p - 1) // 2, p) != 1:
+            return None
+        # Tonelli-Shanks: p - 1 = q * 2^m
+        q, m = p - 1, 0
+        while q % 2 == 0:
+            q //= 2
+            m += 1
+        z = 2
+        while pow(z, (p - 1) // 2, p) != p - 1:
+            z += 1
+        c = pow(z, q, p)
+        y = pow(v, (q + 1) // 2, p)
+        t = pow(v, q, p)
+        while t != 1:
+            i, t2 = 0, t
+            while t2 != 1:
+                t2 = t2 * t2 % p
+                i += 1
+            b = pow(c, 1 << (m - i - 1), p)
+            y = y * b % p
+            c = b * b % p
+            t = t * c % p
+            m = i
+        return y
+
+    def lift_x(self, x):
+        """
+        由x坐标恢复曲线上的点 (x, y)
+        返回:
+            仿射点 (x, y)，y取两个平方根中的任意一个；x不对应曲线上的点时返回None
+        """
+        p = self.p
+        y = self.field_sqrt((x * x * x + self.a * x + self.b) % p)
+        if y is None:
+            return None
+        return (x, y)
+
+    def encode_point(self, P, form='uncompressed'):
+        """
+        点转字节串
+        参数:
+            P: 仿射点 (元组 (x, y))
+            form: 'uncompressed'（04 ∥ x ∥ y）、'compressed'（02/03 ∥ x）
+                  或 'hybrid'（06/07 ∥ x ∥ y），02/03/06/07的最低位是y的奇偶性
+        """
+        x, y = P
+        x_bytes = x.to_bytes(self.l, byteorder='big')
+        if form == 'uncompressed':
+            return b'\x04' + x_bytes + y.to_bytes(self.l, byteorder='big')
+        if form == 'compressed':
+            return bytes([2 | (y & 1)]) + x_bytes
+        if form == 'hybrid':
+            return bytes([6 | (y & 1)]) + x_bytes + y.to_bytes(self.l, byteorder='big')
+        raise ValueError("不支持的点格式")
+
+    def decode_point(self, data):
+        """
+        字节串转点，支持未压缩、压缩和混合三种形式
+        压缩点需要开平方恢复y，结果按编码缓存在self.point_cache中
+        返回:
+            仿射点 (x, y)
+        """
+        data = bytes(data)
+        l = self.l
+        if not data:
+            raise ValueError("无效的点表示")
+        prefix = data[0]
+        if prefix in (2, 3):
+            if len(data) != 1 + l:
+                raise ValueError("无效的点表示")
+            P = self.point_cache.get(data)
+            if P is not None:
+                return P
+            x = int.from_bytes(data[1:], byteorder='big')
+            R = self.lift_x(x) if x < self.p else None
+            if R is None:
+                raise ValueError("压缩点不在椭圆曲线上")
+            y = R[1]
+            if (y & 1) != (prefix & 1):
+                y = (self.p - y) % self.p
+                if (y & 1) != (prefix & 1):
+                    raise ValueError("压缩点不在椭圆曲线上")  # y = 0时没有另一个根
+            P = (x, y)
+            self.point_cache.put(data, P)
+            return P
+        if prefix in (4, 6, 7):
+            if len(data) != 1 + 2 * l:
+                raise ValueError("无效的点表示")
+            x = int.from_bytes(data[1:1 + l], byteorder='big')
+            y = int.from_bytes(data[1 + l:], byteorder='big')
+            if x >= self.p or y >= self.p:
+                raise ValueError("点坐标超出域的范围")
+            if prefix != 4 and (y & 1) != (prefix & 1):
+                raise ValueError("混合形式的点y坐标奇偶性不符")
+            return (x, y)
+        raise ValueError("无效的点表示")
+
+    def encoded_point_length(self, prefix):
+        """根据首字节给出点编码的总长度"""
+        if prefix in (2, 3):
+            return 1 + self.l
+        if prefix in (4, 6, 7):
+            return 1 + 2 * self.l
+        raise ValueError("无效的点表示")
+
+    def point_add(self, P, Q):
+        """椭圆曲线点加（仿射坐标）"""
+        if P == 0: return Q
+        if Q == 0: return P
+        x1, y1 = P
+        x2, y2 = Q
+        
+        if x1 == x2:
+            if y1 != y2:
+                return 0  # 无穷远点
+            return self.point_double(P)
+        
+        field = self.field
+        p = field.p
+        l = (y2 - y1) * field.inverse(x2 - x1) % p
+        x3 = (l*l - x1 - x2) % p
+        y3 = (l*(x1 - x3) - y1) % p
+        return (field.to_int(x3), field.to_int(y3))
+
+    def point_double(self, P):
+        """椭圆曲线二倍点（仿射坐标）"""
+        if P == 0: return P
+        x1, y1 = P
+        field = self.field
+        p = field.p
+        l = (3*x1*x1 + self.field_a) * field.inverse(2*y1) % p
+        x3 = (l*l - 2*x1) % p
+        y3 = (l*(x1 - x3) - y1) % p
+        return (field.to_int(x3), field.to_int(y3))
+
+    def on_curve(self, P):
+        """验证点是否在椭圆曲线上"""
+        if P == 0: return True
+        x, y = P
+        p = self.field.p
+        return (y * y - (x*x + self.field_a) * x - self.b) % p == 0
+
+    def jacobian_double(self, J):
+        """Jacobian坐标二倍点"""
+        X1, Y1, Z1 = J
+        if Z1 == 0 or Y1 == 0:
+            return self.INFINITY_J
+        p = self.field.p
+        YY = Y1 * Y1 % p
+        YYYY = YY * YY % p
+        ZZ = Z1 * Z1 % p
+        S = 4 * X1 * YY % p
+        if self.a_is_minus_3:
+            M = 3 * (X1 - ZZ) * (X1 + ZZ) % p
+        else:
+            M = (3 * X1 * X1 + self.field_a * ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YYYY) % p
+        Z3 = 2 * Y1 * Z1 % p
+        return (X3, Y3, Z3)
+
+    def jacobian_add_mixed(self, J, P):
+        """混合点加：Jacobian点 + 仿射点"""
+        if P == 0:
+            return J
+        X1, Y1, Z1 = J
+        x2, y2 = P
+        if Z1 == 0:
+            return (x2, y2, 1)
+        p = self.field.p
+        Z1Z1 = Z1 * Z1 % p
+        U2 = x2 * Z1Z1 % p
+        S2 = y2 * Z1 * Z1Z1 % p
+        # H、r只参与乘法，不必先取模（各坐标已约化到[0, p)，H = 0当且仅当U2 = X1）
+        H = U2 - X1
+        r = S2 - Y1
+        if H == 0:
+            if r == 0:
+                return self.jacobian_double(J)
+            return self.INFINITY_J  # P + (-P)
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return (X3, Y3, Z3)
+
+    def jacobian_add(self, J1, J2):
+        """Jacobian点 + Jacobian点"""
+        X1, Y1, Z1 = J1
+        X2, Y2, Z2 = J2
+        if Z1 == 0:
+            return J2
+        if Z2 == 0:
+            return J1
+        p = self.field.p
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        H = U2 - U1
+        r = S2 - S1
+        if H == 0:
+            if r == 0:
+                return self.jacobian_double(J1)
+            return self.INFINITY_J
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (r * r - HHH - 2 * V) % p
+        Y3 = (r * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+
+    def jacobian_mult(self, k, P):
+        """
+        Jacobian坐标下的标量乘法[k]P
+        基点G走固定基点表，其他点走wNAF
+        参数:
+            k: 标量 (整数)
+            P: 仿射点 (元组 (x, y) 或 0)
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        if P == (self.Gx, self.Gy):
+            return self.base_mult(k)  # 基点走固定基点表
+        return self.wnaf_mult(k, P)
+
+    def wnaf(self, k, w):
+        """
+        标量的宽度为w的NAF表示（低位在前）
+        非零位都是奇数，绝对值小于2^(w-1)，任意相邻w位中至多一个非零
+        """
+        digits = []
+        full = 1 << w
+        half = 1 << (w - 1)
+        while k:
+            if k & 1:
+                d = k & (full - 1)
+                if d >= half:
+                    d -= full
+                k -= d
+            else:
+                d = 0
+            digits.append(d)
+            k >>= 1
+        return digits
+
+    def wnaf_mult(self, k, P):
+        """
+        wNAF标量乘法[k]P
+        每次调用预计算奇数倍点 P, 3P, ..., (2^(w-1)-1)P（一次模逆转成仿射坐标），
+        负数位利用 -(x, y) = (x, -y) 直接取负，点加次数约为 n比特数/(w+1)
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        Q = self.INFINITY_J
+        if k == 0 or P == 0:
+            return Q
+        p = self.field.p
+        w = self.WNAF_WINDOW
+        J = self.to_jacobian(P)
+        J2 = self.jacobian_double(J)
+        odd = [J]
+        for _ in range((1 << (w - 2)) - 1):
+            odd.append(self.jacobian_add(odd[-1], J2))
+        table = self.batch_to_affine(odd, as_int=False)
+        for d in reversed(self.wnaf(k, w)):
+            Q = self.jacobian_double(Q)
+            if d > 0:
+                Q = self.jacobian_add_mixed(Q, table[d >> 1])
+            elif d < 0:
+                x, y = table[(-d) >> 1]
+                Q = self.jacobian_add_mixed(Q, (x, (-y) % p))
+        return Q
+
+    def _curve_key(self):
+        """当前曲线的参数元组和域运算后端，用作固定基点表的缓存键"""
+        return (self.p, self.a, self.b, self.n, self.Gx, self.Gy, self.field.name)
+
+    def _build_base_table(self):
+        """
+        构建固定基点窗口表
+        第i行保存 [j * 2^(w*i)]G，j = 1 .. 2^w - 1（仿射坐标）
+        """
+        w = self.BASE_WINDOW
+        size = (1 << w) - 1
+        rows = (self.n.bit_length() + w - 1) // w
+        table = []
+        B = (self.Gx, self.Gy)
+        for _ in range(rows):
+            row = []
+            J = self.INFINITY_J
+            for _ in range(size):
+                J = self.jacobian_add_mixed(J, B)
+                row.append(J)
+            # 最后一项再加一次B得到下一行的基点 [2^w]B
+            row.append(self.jacobian_add_mixed(J, B))
+            row = self.batch_to_affine(row, as_int=False)
+            B = row.pop()
+            table.append(tuple(row))
+        return tuple(table)
+
+    def base_table(self):
+        """获取当前曲线的固定基点表（首次调用时构建）"""
+        key = self._curve_key()
+        table = self._base_tables.get(key)
+        if table is None:
+            table = self._build_base_table()
+            self._base_tables[key] = table
+        return table
+
+    def base_mult(self, k):
+        """
+        固定基点标量乘法[k]G
+        按w比特窗口查表，每个窗口一次混合点加，不需要倍点
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        table = self.base_table()
+        w = self.BASE_WINDOW
+        mask = (1 << w) - 1
+        k %= self.n
+        Q = self.INFINITY_J
+        i = 0
+        while k:
+            digit = k & mask
+            if digit:
+                Q = self.jacobian_add_mixed(Q, table[i][digit - 1])
+            k >>= w
+            i += 1
+        return Q
+
+    def save_base_table(self, path):
+        """将固定基点表保存到文件，避免每个进程重新构建"""
+        table = self.base_table()
+        l = (self.p.bit_length() + 7) // 8
+        with open(path, 'wb') as f:
+            f.write(self.BASE_TABLE_MAGIC)
+            f.write(bytes([self.BASE_WINDOW]))
+            f.write(len(table).to_bytes(2, byteorder='big'))
+            for row in table:
+                for x, y in row:
+                    f.write(int(x).to_bytes(l, byteorder='big'))
+                    f.write(int(y).to_bytes(l, byteorder='big'))
+
+    def load_base_table(self, path):
+        """从文件加载固定基点表，并检查它属于当前曲线"""
+        l = (self.p.bit_length() + 7) // 8
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 7 or data[:4] != self.BASE_TABLE_MAGIC or data[4] != self.BASE_WINDOW:
+            raise ValueError("无效的固定基点表文件")
+        rows = int.from_bytes(data[5:7], byteorder='big')
+        size = (1 << self.BASE_WINDOW) - 1
+        if rows != (self.n.bit_length() + self.BASE_WINDOW - 1) // self.BASE_WINDOW \
+                or len(data) != 7 + rows * size * 2 * l:
+            raise ValueError("固定基点表长度不匹配")
+        table = []
+        offset = 7
+        for _ in range(rows):
+            row = []
+            for _ in range(size):
+                x = int.from_bytes(data[offset:offset + l], byteorder='big')
+                y = int.from_bytes(data[offset + l:offset + 2 * l], byteorder='big')
+                offset += 2 * l
+                if not self.on_curve((x, y)):
+                    raise ValueError("固定基点表中的点不在椭圆曲线上")
+                row.append((self.field.element(x), self.field.element(y)))
+            table.append(tuple(row))
+        if table[0][0] != (self.Gx, self.Gy):
+            raise ValueError("固定基点表与当前曲线的基点不一致")
+        # 抽查相邻两行：下一行首项应为 [2^w]（本行首项），也等于本行末项加本行首项
+        doubled = []
+        summed = []
+        for row in table[:-1]:
+            J = self.to_jacobian(row[0])
+            for _ in range(self.BASE_WINDOW):
+                J = self.jacobian_double(J)
+            doubled.append(J)
+            summed.append(self.jacobian_add_mixed(self.to_jacobian(row[-1]), row[0]))
+        expected = self.batch_to_affine(doubled + summed)
+        for i, row in enumerate(table[1:]):
+            first = (int(row[0][0]), int(row[0][1]))
+            if expected[i] != first or expected[len(doubled) + i] != first:
+                raise ValueError("固定基点表内容不一致")
+        self._base_tables[self._curve_key()] = tuple(table)
+
+    def window_tables(self, points):
+        """
+        为若干个点构建窗口表 [1]P .. [2^w - 1]P（仿射坐标）
+        所有点的表项一起转换，共用一次模逆
+        """
+        size = (1 << self.VAR_WINDOW) - 1
+        flat = []
+        for P in points:
+            J = self.INFINITY_J
+            for _ in range(size):
+                J = self.jacobian_add_mixed(J, P)
+                flat.append(J)
+        affine = self.batch_to_affine(flat, as_int=False)
+        return [tuple(affine[i * size:(i + 1) * size]) for i in range(len(points))]
+
+    def jacobian_multi_mult(self, scalars, tables):
+        """
+        交替窗口法（Straus/Shamir）计算 [k1]P1 + [k2]P2 + ...
+        所有标量共用同一串倍点，每个窗口内对各点分别查表做混合点加
+        参数:
+            scalars: 标量列表
+            tables: 与标量一一对应的窗口表（见window_tables）
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        w = self.VAR_WINDOW
+        mask = (1 << w) - 1
+        Q = self.INFINITY_J
+        if not scalars:
+            return Q
+        windows = (max(scalars).bit_length() + w - 1) // w
+        for i in range(windows - 1, -1, -1):
+            if Q[2] != 0:
+                for _ in range(w):
+                    Q = self.jacobian_double(Q)
+            shift = i * w
+            for k, table in zip(scalars, tables):
+                digit = (k >> shift) & mask
+                if digit:
+                    Q = self.jacobian_add_mixed(Q, table[digit - 1])
+        return Q
+
+    def multi_scalar_mult(self, pairs):
+        """
+        多标量乘法 [k1]P1 + [k2]P2 + ...
+        基点G的项走固定基点表，其余点用交替窗口法一次完成
+        参数:
+            pairs: (标量, 仿射点) 元组的列表
+        返回:
+            仿射点 (x, y) 或 0（无穷远点）
+        """
+        G = (self.Gx, self.Gy)
+        Q = self.INFINITY_J
+        scalars = []
+        points = []
+        for k, P in pairs:
+            if k == 0 or P == 0:
+                continue
+            if P == G:
+                Q = self.jacobian_add(Q, self.base_mult(k))
+            else:
+                scalars.append(k)
+                points.append(P)
+        if points:
+            Q = self.jacobian_add(Q, self.jacobian_multi_mult(scalars, self.window_tables(points)))
+        return self.from_jacobian(Q)
+
+    def precompute_point(self, P):
+        """
+        为一个会被反复使用的点做预计算
+        把标量按比特拆成PRECOMP_SPLIT段，预先算出 [2^(m*i)]P 及它们的窗口表，
+        之后的[k]P只需要约 n比特数/PRECOMP_SPLIT 次倍点
+        返回:
+            (每段比特数m, 窗口表列表)
+        """
+        parts = self.PRECOMP_SPLIT
+        m = (self.n.bit_length() + parts - 1) // parts
+        bases = [self.to_jacobian(P)]
+        for _ in range(parts - 1):
+            J = bases[-1]
+            for _ in range(m):
+                J = self.jacobian_double(J)
+            bases.append(J)
+        return (m, self.window_tables(self.batch_to_affine(bases, as_int=False)))
+
+    def precomputed_mult(self, k, precomp):
+        """
+        使用precompute_point的结果计算[k]P
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        return self.jacobian_multi_mult(self.split_scalar(k, precomp), precomp[1])
+
+    def split_scalar(self, k, precomp):
+        """把标量按precompute_point的分段方式拆开，与其窗口表一一对应"""
+        m, tables = precomp
+        mask = (1 << m) - 1
+        last = len(tables) - 1
+        scalars = [(k >> (m * i)) & mask for i in range(last)]
+        scalars.append(k >> (m * last))  # 最高段保留剩余的全部比特
+        return scalars
+
+    def ladder_mult(self, k, P):
+        """
+        Montgomery阶梯标量乘法[k]P
+        标量先加上n或2n补齐到固定的 n比特数+1 位，之后每一比特都恰好做一次点加和一次倍点，
+        运算序列与k的取值无关；R1 - R0 = P 保持不变，点加不会退化成倍点
+        返回:
+            Jacobian点 (X, Y, Z)
+        """
+        if P == 0:
+            return self.INFINITY_J
+        n = self.n
+        bits = n.bit_length()
+        k = k % n + n
+        if k.bit_length() == bits:
+            k += n
+        J = self.to_jacobian(P)
+        R = [J, self.jacobian_double(J)]  # 最高位固定为1
+        for i in range(bits - 1, -1, -1):
+            b = (k >> i) & 1
+            R[1 - b] = self.jacobian_add(R[0], R[1])
+            R[b] = self.jacobian_double(R[b])
+        return R[0]
+
+    def secret_mult(self, k, P):
+        """
+        秘密标量的乘法[k]P（签名的k、解密的私钥、密钥生成等）
+        constant_time为True时使用运算序列固定的Montgomery阶梯，否则与point_mult相同
+        返回:
+            仿射点 (x, y) 或 0（无穷远点）
+        """
+        if self.constant_time:
+            return self.from_jacobian(self.ladder_mult(k, P))
+        return self.from_jacobian(self.jacobian_mult(k, P))
@@ -0,0 +1,314 @@
+"""
+SM2签名与密钥的二进制编码
+签名：定长原始格式 r ∥ s（各size字节）和DER格式 SEQUENCE { INTEGER r, INTEGER s }
+密钥：公钥SubjectPublicKeyInfo、私钥SEC1 ECPrivateKey和PKCS#8（DER）
+解析函数都接受bytes / bytearray / memoryview，内部只对memoryview切片，不复制数据
+"""
+
+EC_PUBLIC_KEY_OID = '1.2.840.10045.2.1'  # id-ecPublicKey
+SM2P256V1_OID = '1.2.156.10197.1.301'  # 推荐曲线sm2p256v1
+
+# 本项目默认使用的是标准附录中的示例曲线，没有注册的OID；
+# curve_oid为None时曲线参数编码为NULL（implicitCurve，由使用方约定）
+
+
+# ---------- 签名：原始格式 ----------
+
+def signature_to_raw(signature, size=32):
+    """签名 (r, s) 编码为 r ∥ s，共2*size字节"""
+    r, s = signature
+    return r.to_bytes(size, byteorder='big') + s.to_bytes(size, byteorder='big')
+
+
+def signature_from_raw(data, size=32):
+    """解析 r ∥ s 格式的签名"""
+    view = memoryview(data)
+    if len(view) != 2 * size:
+        raise ValueError("签名长度错误")
+    return (int.from_bytes(view[:size], byteorder='big'),
+            int.from_bytes(view[size:], byteorder='big'))
+
+
+def signatures_to_raw(signatures, size=32):
+    """批量编码签名，结果是各签名 r ∥ s 的直接拼接"""
+    return b''.join([r.to_bytes(size, byteorder='big') + s.to_bytes(size, byteorder='big')
+                     for r, s in signatures])
+
+
+def signatures_from_raw(data, size=32):
+    """批量解析拼接在一起的 r ∥ s 签名"""
+    view = memoryview(data)
+    step = 2 * size
+    if len(view) % step:
+        raise ValueError("签名数据长度不是单个签名长度的整数倍")
+    return [(int.from_bytes(view[i:i + size], byteorder='big'),
+             int.from_bytes(view[i + size:i + step], byteorder='big'))
+            for i in range(0, len(view), step)]
+
+
+# ---------- DER基础 ----------
+
+def _der_tlv(tag, content):
+    n = len(content)
+    if n < 0x80:
+        length = bytes([n])
+    else:
+        n_bytes = n.to_bytes((n.bit_length() + 7) // 8, byteorder='big')
+        length = bytes([0x80 | len(n_bytes)]) + n_bytes
+    return bytes([tag]) + length + content
+
+
+def _der_read(view, offset=0):
+    """读出一个TLV，返回 (tag, 内容的memoryview, 下一个TLV的偏移)"""
+    if offset + 2 > len(view):
+        raise ValueError("DER数据被截断")
+    tag = view[offset]
+    first = view[offset + 1]
+    offset += 2
+    if first < 0x80:
+        n = first
+    else:
+        count = first & 0x7F
+        if count == 0 or count > 4 or offset + count > len(view):
+            raise ValueError("DER长度字段无效")
+        n = int.from_bytes(view[offset:offset + count], byteorder='big')
+        if n < 0x80 or view[offset] == 0:
+            raise ValueError("DER长度不是最短编码")
+        offset += count
+    if offset + n > len(view):
+        raise ValueError("DER数据被截断")
+    return tag, view[offset:offset + n], offset + n
+
+
+def _der_expect(view, offset, tag):
+    t, content, offset = _der_read(view, offset)
+    if t != tag:
+        raise ValueError("DER标签不符: 期望0x%02x, 实际0x%02x" % (tag, t))
+    return content, offset
+
+
+def _der_integer(x):
+    if x < 0:
+        raise ValueError("不支持负整数")
+    return _der_tlv(0x02, x.to_bytes(x.bit_length() // 8 + 1, byteorder='big'))
+
+
+def _der_parse_integer(content):
+    if len(content) == 0:
+        raise ValueError("DER整数为空")
+    if content[0] & 0x80:
+        raise ValueError("不支持负整数")
+    if len(content) > 1 and content[0] == 0 and not content[1] & 0x80:
+        raise ValueError("DER整数不是最短编码")
+    return int.from_bytes(content, byteorder='big')
+
+
+def _der_oid(oid):
+    parts = [int(x) for x in oid.split('.')]
+    body = bytearray([40 * parts[0] + parts[1]])
+    for v in parts[2:]:
+        chunk = [v & 0x7F]
+        v >>= 7
+        while v:
+            chunk.append(0x80 | (v & 0x7F))
+            v >>= 7
+        body.extend(reversed(chunk))
+    return _der_tlv(0x06, bytes(body))
+
+
+def _der_parse_oid(content):
+    values = []
+    v = 0
+    for b in content:
+        v = (v << 7) | (b & 0x7F)
+        if not b & 0x80:
+            values.append(v)
+            v = 0
+    if not values:
+        raise ValueError("DER对象标识符为空")
+    first = values[0]
+    head = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    return '.'.join(str(x) for x in head + values[1:])
+
+
+def _der_curve(curve_oid):
+    return _der_oid(curve_oid) if curve_oid is not None else _der_tlv(0x05, b'')
+
+
+def _der_parse_curve(tag, content):
+    if tag == 0x06:
+        return _der_parse_oid(content)
+    if tag == 0x05:
+        return None
+    raise ValueError("不支持的曲线参数")
+
+
+def _point_bytes(public_key, size):
+    x, y = public_key
+    return b'\x04' + x.to_bytes(size, byteorder='big') + y.to_bytes(size, byteorder='big')
+
+
+def _parse_point(data, curve):
+    if curve is not None:
+        return curve.bytes_to_point(data)
+    if len(data) % 2 == 0 or data[0] != 4:
+        raise ValueError("不提供曲线时只能解析未压缩的点")
+    size = (len(data) - 1) // 2
+    return (int.from_bytes(data[1:1 + size], byteorder='big'),
+            int.from_bytes(data[1 + size:], byteorder='big'))
+
+
+# ---------- 签名：DER格式 ----------
+
+def signature_to_der(signature):
+    """签名 (r, s) 编码为DER: SEQUENCE { INTEGER r, INTEGER s }"""
+    r, s = signature
+    return _der_tlv(0x30, _der_integer(r) + _der_integer(s))
+
+
+def signature_from_der(data):
+    """解析DER格式签名，要求整个输入恰好是一个签名"""
+    view = memoryview(data)
+    signature, offset = _der_signature_at(view, 0)
+    if offset != len(view):
+        raise ValueError("DER签名后有多余数据")
+    return signature
+
+
+def _der_signature_at(view, offset):
+    body, end = _der_expect(view, offset, 0x30)
+    r_content, pos = _der_expect(body, 0, 0x02)
+    s_content, pos = _der_expect(body, pos, 0x02)
+    if pos != len(body):
+        raise ValueError("DER签名格式错误")
+    return (_der_parse_integer(r_content), _der_parse_integer(s_content)), end
+
+
+def signatures_to_der(signatures):
+    """批量编码DER签名，结果是各签名DER编码的直接拼接"""
+    return b''.join([signature_to_der(sig) for sig in signatures])
+
+
+def signatures_from_der(data):
+    """批量解析直接拼接在一起的DER签名"""
+    view = memoryview(data)
+    signatures = []
+    offset = 0
+    while offset < len(view):
+        signature, offset = _der_signature_at(view, offset)
+        signatures.append(signature)
+    return signatures
+
+
+# ---------- 公钥：SubjectPublicKeyInfo ----------
+
+def public_key_to_der(public_key, curve_oid=None, size=32):
+    """
+    公钥编码为SubjectPublicKeyInfo
+    SEQUENCE { SEQUENCE { id-ecPublicKey, 曲线 }, BIT STRING 04 ∥ x ∥ y }
+    """
+    algorithm = _der_tlv(0x30, _der_oid(EC_PUBLIC_KEY_OID) + _der_curve(curve_oid))
+    point = _der_tlv(0x03, b'\x00' + _point_bytes(public_key, size))
+    return _der_tlv(0x30, algorithm + point)
+
+
+def public_key_from_der(data, curve=None):
+    """
+    解析SubjectPublicKeyInfo
+    参数:
+        curve: 可选的SM2实例，提供时可以解析压缩形式的点
+    返回:
+        (公钥 (x, y), 曲线OID或None)
+    """
+    view = memoryview(data)
+    body, end = _der_expect(view, 0, 0x30)
+    if end != len(view):
+        raise ValueError("公钥后有多余数据")
+    algorithm, pos = _der_expect(body, 0, 0x30)
+    oid, apos = _der_expect(algorithm, 0, 0x06)
+    if _der_parse_oid(oid) != EC_PUBLIC_KEY_OID:
+        raise ValueError("不是椭圆曲线公钥")
+    tag, params, _ = _der_read(algorithm, apos)
+    curve_oid = _der_parse_curve(tag, params)
+    bits, pos = _der_expect(body, pos, 0x03)
+    if len(bits) < 2 or bits[0] != 0:
+        raise ValueError("公钥BIT STRING格式错误")
+    return _parse_point(bits[1:], curve), curve_oid
+
+
+# ---------- 私钥：SEC1 / PKCS#8 ----------
+
+def private_key_to_sec1(private_key, public_key=None, curve_oid=None, size=32):
+    """
+    私钥编码为SEC1 ECPrivateKey
+    SEQUENCE { INTEGER 1, OCTET STRING d, [0] 曲线, [1] BIT STRING 公钥(可选) }
+    """
+    content = _der_integer(1) + _der_tlv(0x04, private_key.to_bytes(size, byteorder='big'))
+    content += _der_tlv(0xA0, _der_curve(curve_oid))
+    if public_key is not None:
+        content += _der_tlv(0xA1, _der_tlv(0x03, b'\x00' + _point_bytes(public_key, size)))
+    return _der_tlv(0x30, content)
+
+
+def private_key_from_sec1(data, curve=None):
+    """
+    解析SEC1 ECPrivateKey
+    返回:
+        (私钥, 公钥 (x, y) 或 None, 曲线OID或None)
+    """
+    view = memoryview(data)
+    body, end = _der_expect(view, 0, 0x30)
+    if end != len(view):
+        raise ValueError("私钥后有多余数据")
+    version, pos = _der_expect(body, 0, 0x02)
+    if _der_parse_integer(version) != 1:
+        raise ValueError("不支持的ECPrivateKey版本")
+    d_bytes, pos = _der_expect(body, pos, 0x04)
+    private_key = int.from_bytes(d_bytes, byteorder='big')
+    curve_oid = None
+    public_key = None
+    while pos < len(body):
+        tag, content, pos = _der_read(body, pos)
+        if tag == 0xA0:
+            inner_tag, params, _ = _der_read(content, 0)
+            curve_oid = _der_parse_curve(inner_tag, params)
+        elif tag == 0xA1:
+            bits, _ = _der_expect(content, 0, 0x03)
+            if len(bits) < 2 or bits[0] != 0:
+                raise ValueError("公钥BIT STRING格式错误")
+            public_key = _parse_point(bits[1:], curve)
+    return private_key, public_key, curve_oid
+
+
+def private_key_to_pkcs8(private_key, public_key=None, curve_oid=None, size=32):
+    """
+    私钥编码为PKCS#8 PrivateKeyInfo
+    SEQUENCE { INTEGER 0, SEQUENCE { id-ecPublicKey, 曲线 }, OCTET STRING ECPrivateKey }
+    """
+    algorithm = _der_tlv(0x30, _der_oid(EC_PUBLIC_KEY_OID) + _der_curve(curve_oid))
+    sec1 = private_key_to_sec1(private_key, public_key, curve_oid, size)
+    return _der_tlv(0x30, _der_integer(0) + algorithm + _der_tlv(0x04, sec1))
+
+
+def private_key_from_pkcs8(data, curve=None):
+    """
+    解析PKCS#8 PrivateKeyInfo
+    返回:
+        (私钥, 公钥 (x, y) 或 None, 曲线OID或None)
+    """
+    view = memoryview(data)
+    body, end = _der_expect(view, 0, 0x30)
+    if end != len(view):
+        raise ValueError("私钥后有多余数据")
+    version, pos = _der_expect(body, 0, 0x02)
+    if _der_parse_integer(version) != 0:
+        raise ValueError("不支持的PrivateKeyInfo版本")
+    algorithm, pos = _der_expect(body, pos, 0x30)
+    oid, apos = _der_expect(algorithm, 0, 0x06)
+    if _der_parse_oid(oid) != EC_PUBLIC_KEY_OID:
+        raise ValueError("不是椭圆曲线私钥")
+    tag, params, _ = _der_read(algorithm, apos)
+    curve_oid = _der_parse_curve(tag, params)
+    sec1, pos = _der_expect(body, pos, 0x04)
+    private_key, public_key, inner_oid = private_key_from_sec1(sec1, curve)
+    return private_key, public_key, curve_oid if curve_oid is not None else inner_oid
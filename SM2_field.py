@@ -0,0 +1,78 @@
+"""
+有限域F_p运算后端
+CurveEngine的点运算都用 后端.p 做模数、用后端的域元素类型保存中间结果，
+后端决定这些整数的实际类型：
+    python: Python内置int
+    gmpy2:  gmpy2.mpz（安装了gmpy2时可用），256比特的乘法取模和求逆都明显更快
+导入时自动选择可用的最快后端，也可以按名称指定
+"""
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+class PythonField:
+    """Python内置int后端"""
+
+    name = 'python'
+
+    def __init__(self, p):
+        self.p = p
+
+    def element(self, x):
+        """整数转为后端的域元素类型"""
+        return x
+
+    def inverse(self, x):
+        """模p求逆"""
+        return pow(x, -1, self.p)
+
+    def to_int(self, x):
+        """域元素转回Python int"""
+        return x
+
+    def points_to_int(self, points):
+        """仿射点列表中的坐标转回Python int（0表示无穷远点）"""
+        return points
+
+
+class GmpyField(PythonField):
+    """gmpy2.mpz后端"""
+
+    name = 'gmpy2'
+
+    def __init__(self, p):
+        self.p = gmpy2.mpz(p)
+
+    def element(self, x):
+        return gmpy2.mpz(x)
+
+    def inverse(self, x):
+        return gmpy2.invert(x, self.p)
+
+    def to_int(self, x):
+        return int(x)
+
+    def points_to_int(self, points):
+        return [P if P == 0 else (int(P[0]), int(P[1])) for P in points]
+
+
+BACKENDS = {'python': PythonField}
+if gmpy2 is not None:
+    BACKENDS['gmpy2'] = GmpyField
+
+# 导入时选定的默认后端
+DEFAULT_BACKEND = 'gmpy2' if gmpy2 is not None else 'python'
+
+
+def field_backend(p, name=None):
+    """
+    创建模p的域运算后端
+    参数:
+        name: 后端名称（见BACKENDS），为None时使用DEFAULT_BACKEND
+    """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError("不可用的域运算后端: %s" % name)
+    return BACKENDS[name](p)
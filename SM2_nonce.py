@@ -0,0 +1,92 @@
+import os
+import queue
+import secrets
+import threading
+
+
+class NoncePool:
+    """
+    签名随机数预计算池
+    后台线程在空闲时预先计算 (k, x1)，其中 (x1, y1) = [k]G，sign只需取出一对做r、s的模运算。
+    每一对只会被取出一次；池被关闭、或在fork出的子进程中使用时，会丢弃全部存量，
+    避免同一个k被两个进程重复使用
+    """
+
+    def __init__(self, sm2, capacity=256, start=True):
+        """
+        参数:
+            sm2: 用于计算[k]G的SM2实例
+            capacity: 池中最多保存的(k, x1)对数
+            start: 是否立即启动后台线程
+        """
+        self.sm2 = sm2
+        self.capacity = capacity
+        self._queue = queue.Queue(maxsize=capacity)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        if start:
+            self.start()
+
+    def _generate(self):
+        """生成一对新的(k, x1)"""
+        sm2 = self.sm2
+        while True:
+            k = secrets.randbelow(sm2.n - 1) + 1
+            P = sm2.secret_mult(k, (sm2.Gx, sm2.Gy))
+            if P != 0:
+                return (k, P[0])
+
+    def _fill(self):
+        while not self._stop.is_set():
+            item = self._generate()
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def start(self):
+        """启动后台预计算线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._fill, name="SM2NoncePool", daemon=True)
+            self._thread.start()
+
+    def take(self):
+        """
+        取出一对(k, x1)，取出后即从池中删除
+        池为空时当场计算一对，不阻塞调用方
+        """
+        if os.getpid() != self._pid:
+            # fork出的子进程继承了父进程的存量，全部丢弃
+            self.discard()
+            self._pid = os.getpid()
+            self._thread = None
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return self._generate()
+
+    def discard(self):
+        """丢弃池中的全部(k, x1)"""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        """停止后台线程并丢弃存量"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+        self.discard()
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def __reduce__(self):
+        raise TypeError("NoncePool不能被序列化，否则同一个k可能被重复使用")
@@ -0,0 +1,50 @@
+"""
+SM2曲线参数
+SM2_EXAMPLE: GB/T 32918附录中的示例曲线（标准示例数据使用的曲线，本项目的默认值）
+SM2P256V1:   GB/T 32918.5推荐的sm2p256v1曲线，
+             p = 2^256 - 2^224 - 2^96 + 2^64 - 1，a = p - 3
+"""
+from collections import namedtuple
+
+CurveParams = namedtuple('CurveParams', ['name', 'p', 'a', 'b', 'n', 'h', 'Gx', 'Gy', 'oid'])
+
+SM2_EXAMPLE = CurveParams(
+    name='sm2-example',
+    p=0x8542D69E4C044F18E8B92435BF6FF7DE457283915C45517D722EDB8B08F1DFC3,
+    a=0x787968B4FA32C3FD2417842E73BBFEFF2F3C848B6831D7E0EC65228B3937E498,
+    b=0x63E4C6D3B23B0C849CF84241484BFE48F61D59A5B16BA06E6E12D1DA27C5249A,
+    n=0x8542D69E4C044F18E8B92435BF6FF7DD297720630485628D5AE74EE7C32E79B7,
+    h=1,
+    Gx=0x421DEBD61B62EAB6746434EBC3CC315E32220B3BADD50BDC4C4E6C147FEDD43D,
+    Gy=0x0680512BCBB42C07D47349D2153B70C4E5D7FDFCBFA36EA1A85841B9E46E09A2,
+    oid=None,
+)
+
+SM2P256V1 = CurveParams(
+    name='sm2p256v1',
+    p=0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFF,
+    a=0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00000000FFFFFFFFFFFFFFFC,
+    b=0x28E9FA9E9D9F5E344D5A9E4BCF6509A7F39789F515AB8F92DDBCBD414D940E93,
+    n=0xFFFFFFFEFFFFFFFFFFFFFFFFFFFFFFFF7203DF6B21C6052B53BBF40939D54123,
+    h=1,
+    Gx=0x32C4AE2C1F1981195F9904466A39C9948FE30BBFF2660BE1715A4589334C74C7,
+    Gy=0xBC3736A2F4F6779C59BDCEE36B692153D0A9877CC62A474002DF32E52139F0A0,
+    oid='1.2.156.10197.1.301',
+)
+
+CURVES = {curve.name: curve for curve in (SM2_EXAMPLE, SM2P256V1)}
+
+
+def get_curve(curve=None):
+    """
+    取得曲线参数
+    参数:
+        curve: CurveParams、曲线名称（见CURVES）或None（示例曲线）
+    """
+    if curve is None:
+        return SM2_EXAMPLE
+    if isinstance(curve, CurveParams):
+        return curve
+    if curve not in CURVES:
+        raise ValueError("未知的曲线: %s" % curve)
+    return CURVES[curve]
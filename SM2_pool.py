@@ -0,0 +1,139 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from SM2 import SM2 as SM2Cipher
+from SM2_signature import SM2 as SM2Signer
+
+# 每个工作进程各自持有的SM2实例，由_init_worker创建一次
+_signer = None
+_cipher = None
+
+
+def _init_worker(base_table_path, curve=None, key_pair=None):
+    """工作进程初始化：创建SM2实例并准备好固定基点表"""
+    global _signer, _cipher
+    _signer = SM2Signer(curve=curve)
+    _cipher = SM2Cipher(curve=curve, key_pair=key_pair)
+    if base_table_path is not None:
+        _signer.load_base_table(base_table_path)
+    else:
+        _signer.base_table()
+
+
+def worker_signer():
+    """工作进程中的签名SM2实例，供在池中执行的模块级函数使用（进程未经_init_worker初始化时为None）"""
+    return _signer
+
+
+def _sign_chunk(args):
+    messages, private_key, public_key, ID = args
+    return [_signer.sign(m, private_key, public_key, ID) for m in messages]
+
+
+def _verify_chunk(items):
+    return _signer.verify_batch(items)
+
+
+def _encrypt_chunk(args):
+    messages, public_key, mode = args
+    return [_cipher.encrypt_bytes(m, mode, public_key=public_key) for m in messages]
+
+
+def _decrypt_chunk(args):
+    ciphertexts, private_key, mode = args
+    return [_cipher.decrypt_bytes(c, mode, private_key=private_key) for c in ciphertexts]
+
+
+class SM2Pool:
+    """
+    多进程SM2运算池
+    每个工作进程只初始化一次曲线状态，任务按chunksize分块提交以摊薄进程间通信开销，
+    结果按输入顺序返回
+    """
+
+    def __init__(self, workers=None, chunksize=64, base_table_path=None, curve=None, key_pair=None):
+        """
+        参数:
+            workers: 工作进程数，默认为CPU核数
+            chunksize: 每次提交给工作进程的任务数
+            base_table_path: 固定基点表文件（见CurveEngine.save_base_table），
+                             为None时每个进程自行构建
+            curve: 曲线参数或名称（见SM2_params），为None时使用示例曲线
+            key_pair: 加解密的默认接收方密钥对 (dB, PB)，所有工作进程共用；
+                      为None时只有示例曲线有默认密钥（见SM2.SM2）
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_init_worker,
+                                             initargs=(base_table_path, curve, key_pair))
+
+    def _chunks(self, seq):
+        seq = list(seq)
+        return [seq[i:i + self.chunksize] for i in range(0, len(seq), self.chunksize)]
+
+    def map(self, func, tasks):
+        """
+        在工作进程中对每个任务调用func，按输入顺序返回结果的迭代器
+        func须是模块级函数，可以使用工作进程中已初始化的SM2实例
+        """
+        return self._executor.map(func, tasks)
+
+    def submit(self, func, *args):
+        """提交单个任务到工作进程，返回concurrent.futures.Future"""
+        return self._executor.submit(func, *args)
+
+    def _run(self, func, chunks):
+        results = []
+        for part in self.map(func, chunks):
+            results.extend(part)
+        return results
+
+    def sign_many(self, messages, private_key, public_key, ID="ALICE123@YAHOO.COM"):
+        """用同一密钥对批量签名，返回 (r, s) 列表"""
+        chunks = [(chunk, private_key, public_key, ID) for chunk in self._chunks(messages)]
+        return self._run(_sign_chunk, chunks)
+
+    def verify_many(self, items):
+        """
+        批量验签，每块在工作进程中走verify_batch
+        参数:
+            items: (message, signature, public_key[, ID]) 元组的列表
+        返回:
+            验证结果列表 (布尔值)
+        """
+        return self._run(_verify_chunk, self._chunks(items))
+
+    def encrypt_many(self, messages, public_key, mode='C1C2C3'):
+        """
+        用同一接收方公钥批量加密（走encrypt_bytes）
+        参数:
+            messages: 明文 (字节串) 列表
+            public_key: 接收方公钥 (元组 (x, y))，为None时使用池的默认密钥
+            mode: 密文排列方式，'C1C2C3' 或 'C1C3C2'
+        返回:
+            密文 (bytes) 列表
+        """
+        chunks = [(chunk, public_key, mode) for chunk in self._chunks(messages)]
+        return self._run(_encrypt_chunk, chunks)
+
+    def decrypt_many(self, ciphertexts, private_key, mode='C1C2C3'):
+        """
+        用同一接收方私钥批量解密（走decrypt_bytes）
+        参数:
+            private_key: 接收方私钥 (整数)，为None时使用池的默认密钥
+        返回:
+            明文 (bytes) 列表
+        """
+        chunks = [(chunk, private_key, mode) for chunk in self._chunks(ciphertexts)]
+        return self._run(_decrypt_chunk, chunks)
+
+    def close(self):
+        """关闭工作进程"""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
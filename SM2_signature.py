@@ -1,22 +1,57 @@
-import random
-from math import gcd, ceil, log
-from gmssl import sm3
+import secrets
+from math import gcd
+from SM2_sm3 import sm3_digest, hmac_sm3
+from SM2_curve import CurveEngine
+from SM2_cache import LRUCache
+from SM2_stats import phase_timer
 import hashlib
 
-class SM2:
-    def __init__(self):
-        # 椭圆曲线系统参数
-        self.p = 0x8542D69E4C044F18E8B92435BF6FF7DE457283915C45517D722EDB8B08F1DFC3
-        self.a = 0x787968B4FA32C3FD2417842E73BBFEFF2F3C848B6831D7E0EC65228B3937E498
-        self.b = 0x63E4C6D3B23B0C849CF84241484BFE48F61D59A5B16BA06E6E12D1DA27C5249A
-        self.h = 1
-        self.Gx = 0x421DEBD61B62EAB6746434EBC3CC315E32220B3BADD50BDC4C4E6C147FEDD43D
-        self.Gy = 0x0680512BCBB42C07D47349D2153B70C4E5D7FDFCBFA36EA1A85841B9E46E09A2
-        self.n = 0x8542D69E4C044F18E8B92435BF6FF7DD297720630485628D5AE74EE7C32E79B7
-        
-        # 计算域元素字节长度
-        self.t = ceil(log(self.p, 2))
-        self.l = ceil(self.t / 8)
+class SigningKey:
+    """
+    长期使用的签名私钥
+    保存私钥dA、公钥PA、预先算好的(1 + dA)^-1 mod n，以及按ID缓存的ZA，
+    用同一把密钥反复签名时不再重复这些只与密钥有关的计算
+    """
+    def __init__(self, private_key, public_key, n):
+        if (1 + private_key) % n == 0:
+            raise ValueError("私钥无效：1 + dA 不可逆")
+        self.d = private_key
+        self.public_key = tuple(public_key)
+        self.inv_1_plus_d = pow(1 + private_key, -1, n)
+        self.ZA = {}  # ID -> ZA
+
+class SM2(CurveEngine):
+    BATCH_GROUP = 8  # 批量验签时每组的签名数
+    BATCH_Z_BITS = 64  # 批量验签随机线性组合系数的比特数，决定批量检查的可靠性（见verify_batch）
+    
+    def __init__(self, *, key_cache_size=1024, za_cache_size=1024, constant_time=False,
+                 deterministic_nonce=False, point_cache_size=1024, field_backend=None,
+                 curve=None):
+        # 椭圆曲线系统参数（见SM2_params）
+        self.setup_curve(curve)
+        
+        # 验签方公钥预计算缓存：公钥 -> 窗口表
+        self.key_cache = LRUCache(key_cache_size)
+        
+        # ZA缓存：(ID, 公钥) -> ZA；曲线参数部分 a || b || xG || yG 是常量，预先拼好
+        self.za_cache = LRUCache(za_cache_size)
+        self.curve_bytes = (self.fielde_to_bytes(self.a) + self.fielde_to_bytes(self.b) +
+                            self.fielde_to_bytes(self.Gx) + self.fielde_to_bytes(self.Gy))
+        
+        # 秘密标量乘法（签名的k、密钥生成）是否使用Montgomery阶梯
+        self.constant_time = constant_time
+        
+        # 可选的随机数预计算池（见SM2_nonce.NoncePool），为None时sign现场计算[k]G
+        self.nonce_pool = None
+        
+        # 是否用HMAC-SM3由私钥和消息摘要确定性地生成k（RFC 6979的方式），开启后不使用nonce_pool
+        self.deterministic_nonce = deterministic_nonce
+        
+        # 压缩公钥解压缓存：编码 -> 点
+        self.point_cache = LRUCache(point_cache_size)
+        
+        # 域运算后端（见SM2_field），为None时自动选择
+        self.setup_field(field_backend)
     
     def int_to_bytes(self, x, k=None):
         """整数转字节串"""
@@ -36,21 +71,19 @@ class SM2:
         """字节串转域元素"""
         return self.bytes_to_int(M)
     
-    def point_to_bytes(self, P):
-        """点转字节串（未压缩形式）"""
-        xp, yp = P
-        x_bytes = self.fielde_to_bytes(xp)
-        y_bytes = self.fielde_to_bytes(yp)
-        return b'\x04' + x_bytes + y_bytes
+    def message_bytes(self, message):
+        """消息转为字节串：字符串按UTF-8编码，bytes / memoryview原样使用"""
+        if isinstance(message, str):
+            return message.encode('utf-8')
+        return bytes(message)
+    
+    def point_to_bytes(self, P, form='uncompressed'):
+        """点转字节串（form: 'uncompressed' / 'compressed' / 'hybrid'）"""
+        return self.encode_point(P, form)
     
     def bytes_to_point(self, s):
-        """字节串转点"""
-        if s[0] != 4:
-            raise ValueError("不支持压缩点格式")
-        l = (len(s) - 1) // 2
-        x = self.bytes_to_fielde(s[1:1+l])
-        y = self.bytes_to_fielde(s[1+l:1+2*l])
-        return (x, y)
+        """字节串转点（支持未压缩、压缩、混合形式）"""
+        return self.decode_point(s)
     
     def mod_inverse(self, a, m):
         """模逆计算"""
@@ -58,50 +91,61 @@ class SM2:
             return None
         return pow(a, -1, m)
     
-    def point_add(self, P, Q):
-        """椭圆曲线点加"""
-        if P == 0: return Q
-        if Q == 0: return P
-        x1, y1 = P
-        x2, y2 = Q
-        
-        if x1 == x2:
-            if y1 != y2:
-                return 0  # 无穷远点
-            return self.point_double(P)
-        
-        l = ((y2 - y1) * self.mod_inverse(x2 - x1, self.p)) % self.p
-        x3 = (l*l - x1 - x2) % self.p
-        y3 = (l*(x1 - x3) - y1) % self.p
-        return (x3, y3)
-    
-    def point_double(self, P):
-        """椭圆曲线二倍点"""
-        if P == 0: return P
-        x1, y1 = P
-        l = ((3*x1*x1 + self.a) * self.mod_inverse(2*y1, self.p)) % self.p
-        x3 = (l*l - 2*x1) % self.p
-        y3 = (l*(x1 - x3) - y1) % self.p
-        return (x3, y3)
-    
     def point_mult(self, k, P):
         """椭圆曲线多倍点计算（标量乘法）"""
-        Q = 0  # 无穷远点
-        bits = bin(k)[2:]
-        
-        for bit in bits:
-            Q = self.point_double(Q)
-            if bit == '1':
-                Q = self.point_add(Q, P)
-        return Q
-    
-    def on_curve(self, P):
-        """验证点是否在椭圆曲线上"""
-        if P == 0: return True
-        x, y = P
-        left = (y * y) % self.p
-        right = (x*x*x + self.a*x + self.b) % self.p
-        return left == right
+        # 在Jacobian坐标下完成全部倍点和点加，最后只做一次模逆
+        return self.from_jacobian(self.jacobian_mult(k, P))
+    
+    def generate_keypair(self):
+        """
+        生成SM2密钥对
+        私钥dA ∈ [1, n-2]取自secrets（CSPRNG），公钥PA = [dA]G走秘密标量乘法
+        返回:
+            (私钥, 公钥)
+        """
+        d = secrets.randbelow(self.n - 2) + 1
+        return d, self.secret_mult(d, (self.Gx, self.Gy))
+    
+    def generate_keypairs(self, count, chunk_size=256):
+        """
+        批量生成SM2密钥对（生成器）
+        每块chunk_size个私钥，[dA]G在Jacobian坐标下计算（固定基点表，constant_time时走阶梯），
+        整块一起转仿射坐标，只做一次模逆；结果逐块产生，不必一次保存全部密钥
+        参数:
+            count: 密钥对个数
+            chunk_size: 每块的密钥对个数
+        返回:
+            逐个产生 (私钥, 公钥)
+        """
+        G = (self.Gx, self.Gy)
+        mult = self.ladder_mult if self.constant_time else self.jacobian_mult
+        for start in range(0, count, chunk_size):
+            size = min(chunk_size, count - start)
+            keys = [secrets.randbelow(self.n - 2) + 1 for _ in range(size)]
+            points = self.batch_to_affine([mult(d, G) for d in keys])
+            yield from zip(keys, points)
+    
+    def signing_key(self, private_key, public_key=None):
+        """
+        构造签名私钥对象
+        参数:
+            private_key: 私钥 (整数)；已经是SigningKey时原样返回
+            public_key: 公钥 (元组 (x, y))，为None时由私钥计算
+        返回:
+            SigningKey
+        """
+        if isinstance(private_key, SigningKey):
+            return private_key
+        if public_key is None:
+            public_key = self.secret_mult(private_key, (self.Gx, self.Gy))
+        return SigningKey(private_key, public_key, self.n)
+    
+    def key_ZA(self, key, ID):
+        """取SigningKey中缓存的ZA，没有时计算并存入"""
+        ZA = key.ZA.get(ID)
+        if ZA is None:
+            ZA = key.ZA[ID] = self.compute_ZA(ID, key.public_key)
+        return ZA
     
     def compute_ZA(self, ID, public_key):
         """
@@ -109,58 +153,88 @@ class SM2:
         参数:
             ID: 用户身份标识 (字符串)
             public_key: 公钥 (元组 (x, y))
+        结果按(ID, 公钥)缓存在self.za_cache中
         """
+        xA, yA = public_key
+        key = (ID, xA, yA)
+        ZA = self.za_cache.get(key)
+        if ZA is not None:
+            return ZA
+        
         # 计算ID长度
-        entl = len(ID.encode('utf-8')) * 8
+        ID_bytes = ID.encode('utf-8')
+        entl = len(ID_bytes) * 8
         entl_bytes = entl.to_bytes(2, byteorder='big')
         
         # 准备哈希输入
-        a_bytes = self.fielde_to_bytes(self.a)
-        b_bytes = self.fielde_to_bytes(self.b)
-        xG_bytes = self.fielde_to_bytes(self.Gx)
-        yG_bytes = self.fielde_to_bytes(self.Gy)
-        xA, yA = public_key
         xA_bytes = self.fielde_to_bytes(xA)
         yA_bytes = self.fielde_to_bytes(yA)
         
-        # 构造哈希输入
-        hash_input = (entl_bytes + ID.encode('utf-8') + a_bytes + b_bytes + 
-                     xG_bytes + yG_bytes + xA_bytes + yA_bytes)
+        # 构造哈希输入（a || b || xG || yG 使用预先拼好的常量）
+        hash_input = entl_bytes + ID_bytes + self.curve_bytes + xA_bytes + yA_bytes
         
         # 计算SM3哈希
-        hash_value = sm3.sm3_hash(list(hash_input))
-        return bytes.fromhex(hash_value)
+        ZA = sm3_digest(hash_input)
+        self.za_cache.put(key, ZA)
+        return ZA
     
-    def sign(self, message, private_key, public_key, ID="ALICE123@YAHOO.COM"):
+    def invalidate_ZA(self, ID=None, public_key=None):
+        """
+        使ZA缓存失效
+        同时给出ID和公钥时只删除这一项，否则清空整个ZA缓存
+        返回:
+            被删除的缓存项是否存在 (布尔值)；清空时返回True
+        """
+        if ID is not None and public_key is not None:
+            xA, yA = public_key
+            return self.za_cache.invalidate((ID, xA, yA))
+        self.za_cache.clear()
+        return True
+    
+    def sign(self, message, private_key, public_key=None, ID="ALICE123@YAHOO.COM"):
         """
         SM2数字签名生成
         参数:
-            message: 待签名的消息 (字符串)
-            private_key: 私钥 (整数)
-            public_key: 公钥 (元组 (x, y))
+            message: 待签名的消息 (字符串或字节串)
+            private_key: 私钥 (整数或SigningKey)
+            public_key: 公钥 (元组 (x, y))，private_key为SigningKey时可省略
             ID: 用户身份标识 (字符串)
         返回:
             签名 (r, s)
         """
+        timer = phase_timer('sign')  # 统计未开启时为None
+        key = self.signing_key(private_key, public_key)
+        
         # 步骤1: 计算ZA。构造M~ = ZA || M
-        ZA = self.compute_ZA(ID, public_key)
-        M = message.encode('utf-8')
+        ZA = self.key_ZA(key, ID)
+        M = self.message_bytes(message)
         M_tilde = ZA + M
+        if timer: timer.mark('ZA')
         
         # 步骤2: 计算e = Hv(M~)
-        e_hash = sm3.sm3_hash(list(M_tilde))
-        e = int(e_hash, 16) % self.n
+        e_hash = sm3_digest(M_tilde)
+        e = int.from_bytes(e_hash, byteorder='big') % self.n
+        if timer: timer.mark('hash')
         
         # 步骤3: 生成随机数k ∈ [1, n-1]
+        nonces = self.deterministic_nonces(key.d, e_hash) if self.deterministic_nonce else None
         while True:
-            k = random.randint(1, self.n-1)
-            #k=0x6CB28D99385C175C94F94E934817663FC176D925DD72B727260DBAAE1FB2F96F
-
-            # 步骤4: 计算椭圆曲线点(x1, y1) = [k]G
-            P = self.point_mult(k, (self.Gx, self.Gy))
-            if P == 0:
-                continue
-            x1, y1 = P
+            if nonces is None and self.nonce_pool is not None:
+                # 步骤3、4: 直接从预计算池取出(k, x1)
+                k, x1 = self.nonce_pool.take()
+            else:
+                if nonces is not None:
+                    k = next(nonces)
+                else:
+                    k = secrets.randbelow(self.n - 1) + 1
+                #k=0x6CB28D99385C175C94F94E934817663FC176D925DD72B727260DBAAE1FB2F96F
+                
+                # 步骤4: 计算椭圆曲线点(x1, y1) = [k]G
+                P = self.secret_mult(k, (self.Gx, self.Gy))
+                if P == 0:
+                    continue
+                x1, y1 = P
+            if timer: timer.mark('scalar_mult')
             
             # 步骤5: 计算r = (e + x1) mod n
             r = (e + x1) % self.n
@@ -168,33 +242,74 @@ class SM2:
                 continue
             
             # 步骤6: 计算s = ((1 + dA)^-1 * (k - r * dA)) mod n
-            dA = private_key
-            s = (self.mod_inverse(1 + dA, self.n) * (k - r * dA) )% self.n
+            dA = key.d
+            s = (key.inv_1_plus_d * (k - r * dA) )% self.n
             if s == 0:
                 continue
+            if timer: timer.mark('final')
                 
             return (r, s)
     
+    def deterministic_nonces(self, private_key, e_hash):
+        """
+        确定性随机数生成（RFC 6979的流程，HMAC使用SM3）
+        由私钥和消息摘要派生k，同一(私钥, 消息)总是得到同一个k，不同消息的k互不相关
+        参数:
+            private_key: 私钥dA (整数)
+            e_hash: 消息摘要 Hv(ZA || M) (字节串)
+        返回:
+            依次产生候选k ∈ [1, n-1] 的生成器（当前k不可用时继续取下一个）
+        """
+        qlen = self.n.bit_length()
+        rlen = (qlen + 7) // 8
+        
+        def bits2int(b):
+            v = int.from_bytes(b, byteorder='big')
+            if len(b) * 8 > qlen:
+                v >>= len(b) * 8 - qlen
+            return v
+        
+        x = private_key.to_bytes(rlen, byteorder='big')
+        h1 = (bits2int(e_hash) % self.n).to_bytes(rlen, byteorder='big')
+        V = b'\x01' * 32
+        K = b'\x00' * 32
+        K = hmac_sm3(K, V + b'\x00' + x + h1)
+        V = hmac_sm3(K, V)
+        K = hmac_sm3(K, V + b'\x01' + x + h1)
+        V = hmac_sm3(K, V)
+        while True:
+            T = b''
+            while len(T) < rlen:
+                V = hmac_sm3(K, V)
+                T += V
+            k = bits2int(T[:rlen])
+            if 1 <= k < self.n:
+                yield k
+            K = hmac_sm3(K, V + b'\x00')
+            V = hmac_sm3(K, V)
+    
     def sign_att(self, message, private_key, public_key,k_set,ID="ALICE123@YAHOO.COM"):
         """
         SM2数字签名生成
         参数:
-            message: 待签名的消息 (字符串)
-            private_key: 私钥 (整数)
-            public_key: 公钥 (元组 (x, y))
+            message: 待签名的消息 (字符串或字节串)
+            private_key: 私钥 (整数或SigningKey)
+            public_key: 公钥 (元组 (x, y))，private_key为SigningKey时可传None
             k_set: 手动设置的k (整数)
             ID: 用户身份标识 (字符串)
         返回:
             签名 (r, s)
         """
+        key = self.signing_key(private_key, public_key)
+        
         # 步骤1: 计算ZA。构造M~ = ZA || M
-        ZA = self.compute_ZA(ID, public_key)
-        M = message.encode('utf-8')
+        ZA = self.key_ZA(key, ID)
+        M = self.message_bytes(message)
         M_tilde = ZA + M
         
         # 步骤2: 计算e = Hv(M~)
-        e_hash = sm3.sm3_hash(list(M_tilde))
-        e = int(e_hash, 16) % self.n
+        e_hash = sm3_digest(M_tilde)
+        e = int.from_bytes(e_hash, byteorder='big') % self.n
         
         # 步骤3: 生成随机数k ∈ [1, n-1]
         while True:
@@ -203,7 +318,7 @@ class SM2:
             k=k_set
             
             # 步骤4: 计算椭圆曲线点(x1, y1) = [k]G
-            P = self.point_mult(k, (self.Gx, self.Gy))
+            P = self.secret_mult(k, (self.Gx, self.Gy))
             if P == 0:
                 continue
             x1, y1 = P
@@ -214,19 +329,33 @@ class SM2:
                 continue
             
             # 步骤6: 计算s = ((1 + dA)^-1 * (k - r * dA)) mod n
-            dA = private_key
-            s = (self.mod_inverse(1 + dA, self.n) * (k - r * dA) )% self.n
+            dA = key.d
+            s = (key.inv_1_plus_d * (k - r * dA) )% self.n
             if s == 0:
                 continue
                 
             return (r, s)
     
     
+    def public_key_precomp(self, public_key):
+        """
+        获取公钥的预计算窗口表（见precompute_point），按公钥缓存在self.key_cache中
+        未命中时现场计算并放入缓存；缓存关闭时不做预计算，返回None
+        """
+        key = tuple(public_key)
+        if self.key_cache.maxsize <= 0:
+            return None
+        precomp = self.key_cache.get(key)
+        if precomp is None:
+            precomp = self.precompute_point(key)
+            self.key_cache.put(key, precomp)
+        return precomp
+    
     def verify(self, message, signature, public_key, ID="ALICE123@YAHOO.COM"):
         """
         SM2数字签名验证
         参数:
-            message: 原始消息 (字符串)
+            message: 原始消息 (字符串或字节串)
             signature: 签名 (元组 (r, s))
             public_key: 公钥 (元组 (x, y))
             ID: 用户身份标识 (字符串)
@@ -240,14 +369,18 @@ class SM2:
         if not (1 <= r <= self.n-1 and 1 <= s <= self.n-1):
             return False
         
+        timer = phase_timer('verify')  # 统计未开启时为None
+        
         # 步骤3: 计算ZA 构造M~ = ZA || M
         ZA = self.compute_ZA(ID, public_key)
-        M = message.encode('utf-8')
+        M = self.message_bytes(message)
         M_tilde = ZA + M
+        if timer: timer.mark('ZA')
         
         # 步骤4: 计算e = Hv(M~)
-        e_hash = sm3.sm3_hash(list(M_tilde))
-        e = int(e_hash, 16) % self.n
+        e_hash = sm3_digest(M_tilde)
+        e = int.from_bytes(e_hash, byteorder='big') % self.n
+        if timer: timer.mark('hash')
         
         # 步骤5: 计算t = (r + s) mod n
         t = (r + s) % self.n
@@ -255,20 +388,163 @@ class SM2:
             return False
         
         # 步骤6: 计算椭圆曲线点(x1', y1') = [s]G + [t]PA
-        sG = self.point_mult(s, (self.Gx, self.Gy))
-        tPA = self.point_mult(t, (xA, yA))
-        P = self.point_add(sG, tPA)
+        precomp = self.public_key_precomp(public_key)
+        # [s]G走固定基点表，[t]PA走公钥缓存中的预计算表
+        if precomp is not None:
+            tPA = self.precomputed_mult(t, precomp)
+        else:
+            tPA = self.wnaf_mult(t, (xA, yA))
+        Q = self.jacobian_add(self.base_mult(s), tPA)
+        P = self.from_jacobian(Q)
+        if timer: timer.mark('scalar_mult')
         if P == 0:
             return False
         x1_prime, y1_prime = P
         
         # 步骤7: 计算R = (e + x1') mod n
         R = (e + x1_prime) % self.n
+        if timer: timer.mark('final')
         
         # 步骤8: 验证R == r
         return R == r
 
 
+    def verify_batch(self, items):
+        """
+        SM2数字签名批量验证
+        同一公钥的签名分组，每组用随机线性组合检查
+            [Σ z_i s_i]G + [Σ z_i t_i]PA = Σ ±[z_i]R_i
+        其中R_i = (x1_i, y1_i)由r_i - e_i恢复（y的符号未知，组内枚举符号组合）。
+        左边只有一次固定基点乘法和一次公钥预计算表乘法，右边每项是一次BATCH_Z_BITS比特的标量乘法，
+        所以只对同一公钥的签名有收益；公钥只出现一次的签名直接走verify。
+        某组检查失败时二分定位。
+        注意这是概率性检查，不能完全替代verify：z_i是奇数，只有BATCH_Z_BITS - 1比特随机，
+        且只比较x坐标、接受2^(g-1)种符号组合，一组含无效签名却通过的概率约为
+        2^g / 2^(BATCH_Z_BITS - 1)（默认每组8个时约2^-55）
+        参数:
+            items: (message, signature, public_key[, ID]) 元组的列表
+        返回:
+            与items一一对应的验证结果列表 (布尔值)
+        """
+        results = [False] * len(items)
+        by_key = {}
+        for i, item in enumerate(items):
+            by_key.setdefault(tuple(item[2]), []).append(i)
+        for indices in by_key.values():
+            if len(indices) == 1:
+                results[indices[0]] = self.verify(*items[indices[0]])
+                continue
+            pending = []
+            for i in indices:
+                prepared = self._batch_prepare(items[i])
+                if prepared is None:
+                    results[i] = self.verify(*items[i])
+                elif prepared is not False:
+                    pending.append((i, prepared))
+            for start in range(0, len(pending), self.BATCH_GROUP):
+                self._batch_bisect(pending[start:start + self.BATCH_GROUP], items, results)
+        return results
+    
+    def _batch_prepare(self, item):
+        """
+        批量验证的预处理：检查r, s范围，计算e和t，并恢复点R
+        返回:
+            (s, t, 公钥, R)；签名必然无效时返回False；
+            R的x坐标无法唯一确定（x1 + n < p）时返回None，由调用方单独验证
+        """
+        message, signature, public_key = item[:3]
+        ID = item[3] if len(item) > 3 else "ALICE123@YAHOO.COM"
+        r, s = signature
+        if not (1 <= r <= self.n-1 and 1 <= s <= self.n-1):
+            return False
+        
+        ZA = self.compute_ZA(ID, public_key)
+        e_hash = sm3_digest(ZA + self.message_bytes(message))
+        e = int.from_bytes(e_hash, byteorder='big') % self.n
+        t = (r + s) % self.n
+        if t == 0:
+            return False
+        
+        # R = (e + x1') mod n  =>  x1' = (r - e) mod n 或 (r - e) mod n + n
+        x1 = (r - e) % self.n
+        if x1 + self.n < self.p:
+            return None
+        R = self.lift_x(x1)
+        if R is None:
+            return False
+        return (s, t, tuple(public_key), R)
+    
+    def _batch_bisect(self, group, items, results):
+        """检查一组签名，失败时二分，直到定位出无效的签名"""
+        if len(group) == 1:
+            i = group[0][0]
+            results[i] = self.verify(*items[i])
+            return
+        if self._batch_check([prepared for _, prepared in group]):
+            for i, _ in group:
+                results[i] = True
+            return
+        half = len(group) // 2
+        self._batch_bisect(group[:half], items, results)
+        self._batch_bisect(group[half:], items, results)
+    
+    def _batch_check(self, group):
+        """
+        对同一公钥的一组预处理结果做随机线性组合检查
+        z_0 = 1，其余z_i为BATCH_Z_BITS比特的随机数，组内枚举2^(g-1)种R_i符号组合
+        """
+        n, p = self.n, self.field.p
+        z = [1] + [secrets.randbits(self.BATCH_Z_BITS) | 1 for _ in group[1:]]
+        
+        # 左边：[Σ z_i s_i]G + [Σ z_i t_i]PA
+        s_sum = 0
+        t_sum = 0
+        for zi, (s, t, _, _) in zip(z, group):
+            s_sum += zi * s
+            t_sum += zi * t
+        PA = group[0][2]
+        precomp = self.public_key_precomp(PA)
+        if precomp is not None:
+            tPA = self.precomputed_mult(t_sum % n, precomp)
+        else:
+            tPA = self.wnaf_mult(t_sum % n, PA)
+        S = self.jacobian_add(self.base_mult(s_sum % n), tPA)
+        
+        # 右边：W_i = [z_i]R_i，以及符号翻转时用到的 [2]W_i
+        R_tables = self.window_tables([R for _, _, _, R in group[1:]])
+        W = [self.to_jacobian(group[0][3])]
+        W += [self.jacobian_multi_mult([zi], [table]) for zi, table in zip(z[1:], R_tables)]
+        affine = self.batch_to_affine(W + [self.jacobian_double(Wi) for Wi in W] + [S], as_int=False)
+        g = len(group)
+        W, D, S = affine[:g], affine[g:2*g], affine[-1]
+        
+        def matches(T):
+            # 只比较x坐标，T = ±S 都算匹配（对应全体符号取反）
+            X, Y, Z = T
+            if Z == 0 or S == 0:
+                return Z == 0 and S == 0
+            return X == S[0] * Z * Z % p
+        
+        T = self.INFINITY_J
+        for Wi in W:
+            T = self.jacobian_add_mixed(T, Wi)
+        if matches(T):
+            return True
+        # Gray码枚举其余符号组合（第0项符号固定），每步只翻转一个R_i的符号
+        signs = [1] * g
+        for step in range(1, 1 << (g - 1)):
+            i = (step & -step).bit_length()
+            x, y = D[i]
+            if signs[i] == 1:
+                T = self.jacobian_add_mixed(T, (x, (-y) % p))
+            else:
+                T = self.jacobian_add_mixed(T, (x, y))
+            signs[i] = -signs[i]
+            if matches(T):
+                return True
+        return False
+
+
 
 if __name__ == "__main__":
     
@@ -354,8 +630,7 @@ if __name__ == "__main__":
     private_key_Alice=private_key
     public_key_Alice=public_key
     
-    private_key_Bob=random.randint(1, sm2.n-1)
-    public_key_Bob=sm2.point_mult(private_key_Bob,(sm2.Gx,sm2.Gy))
+    private_key_Bob,public_key_Bob=sm2.generate_keypair()
     print("Alice's key is :\nprivate_key: ",hex(private_key_Alice),"\npublic_key: ",hex(public_key_Alice[0]),", ",hex(public_key_Alice[1]))
     print("Bob's key is :\nprivate_key: ",hex(private_key_Bob),"\npublic_key: ",hex(public_key_Bob[0]),", ",hex(public_key_Bob[1]))
     
@@ -0,0 +1,132 @@
+import hashlib
+import hmac
+import struct
+
+# SM3初始值
+_IV = (0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
+       0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E)
+_MASK = 0xFFFFFFFF
+
+
+def _rotl(x, n):
+    """32位循环左移"""
+    n %= 32
+    return ((x << n) | (x >> (32 - n))) & _MASK
+
+
+# 每轮常量 T_j <<< j，预先算好
+_T_ROT = tuple(_rotl(0x79CC4519 if j < 16 else 0x7A879D8A, j) for j in range(64))
+
+
+def _compress(V, block):
+    """SM3压缩函数，处理一个64字节分组"""
+    W = list(struct.unpack('>16I', block))
+    for j in range(16, 68):
+        x = W[j - 16] ^ W[j - 9] ^ _rotl(W[j - 3], 15)
+        x ^= ((x << 15) | (x >> 17)) & _MASK ^ ((x << 23) | (x >> 9)) & _MASK
+        W.append(x ^ _rotl(W[j - 13], 7) ^ W[j - 6])
+
+    A, B, C, D, E, F, G, H = V
+    for j in range(64):
+        A12 = ((A << 12) | (A >> 20)) & _MASK
+        SS1 = (A12 + E + _T_ROT[j]) & _MASK
+        SS1 = ((SS1 << 7) | (SS1 >> 25)) & _MASK
+        SS2 = SS1 ^ A12
+        if j < 16:
+            FF = A ^ B ^ C
+            GG = E ^ F ^ G
+        else:
+            FF = (A & B) | (A & C) | (B & C)
+            GG = (E & F) | (~E & G)
+        TT1 = (FF + D + SS2 + (W[j] ^ W[j + 4])) & _MASK
+        TT2 = (GG + H + SS1 + W[j]) & _MASK
+        D = C
+        C = ((B << 9) | (B >> 23)) & _MASK
+        B = A
+        A = TT1
+        H = G
+        G = ((F << 19) | (F >> 13)) & _MASK
+        F = E
+        E = TT2 ^ ((TT2 << 9) | (TT2 >> 23)) & _MASK ^ ((TT2 << 17) | (TT2 >> 15)) & _MASK
+    return (V[0] ^ A, V[1] ^ B, V[2] ^ C, V[3] ^ D,
+            V[4] ^ E, V[5] ^ F, V[6] ^ G, V[7] ^ H)
+
+
+class SM3:
+    """
+    纯Python实现的SM3，接口与hashlib的哈希对象一致
+    （update / copy / digest / hexdigest），输入输出均为字节串
+    """
+
+    name = 'sm3'
+    digest_size = 32
+    block_size = 64
+
+    def __init__(self, data=b''):
+        self._V = _IV
+        self._buffer = b''
+        self._length = 0
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        """追加消息数据"""
+        data = bytes(data)
+        self._length += len(data)
+        buf = self._buffer + data
+        V = self._V
+        end = len(buf) - len(buf) % 64
+        for i in range(0, end, 64):
+            V = _compress(V, buf[i:i + 64])
+        self._V = V
+        self._buffer = buf[end:]
+
+    def copy(self):
+        """复制当前哈希状态"""
+        other = SM3.__new__(SM3)
+        other._V = self._V
+        other._buffer = self._buffer
+        other._length = self._length
+        return other
+
+    def digest(self):
+        """返回32字节摘要（不改变当前状态）"""
+        bit_length = self._length * 8
+        tail = self._buffer + b'\x80' + b'\x00' * ((55 - self._length) % 64)
+        tail += bit_length.to_bytes(8, byteorder='big')
+        V = self._V
+        for i in range(0, len(tail), 64):
+            V = _compress(V, tail[i:i + 64])
+        return struct.pack('>8I', *V)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+def _openssl_sm3_available():
+    try:
+        hashlib.new('sm3')
+    except ValueError:
+        return False
+    return True
+
+
+# 优先使用OpenSSL提供的SM3，不可用时退回纯Python实现
+BACKEND = 'openssl' if _openssl_sm3_available() else 'python'
+
+
+def sm3_new(data=b''):
+    """创建SM3哈希对象，支持增量update()"""
+    if BACKEND == 'openssl':
+        return hashlib.new('sm3', data)
+    return SM3(data)
+
+
+def sm3_digest(data):
+    """计算SM3摘要，字节串输入，32字节串输出"""
+    return sm3_new(data).digest()
+
+
+def hmac_sm3(key, data):
+    """HMAC-SM3，返回32字节串"""
+    return hmac.new(key, data, sm3_new).digest()
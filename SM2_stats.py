@@ -0,0 +1,192 @@
+"""
+SM2运算统计（默认关闭）
+开启后统计点加、倍点、模逆的调用次数和SM3的计算次数，以及sign / verify各阶段（ZA、哈希、标量乘法、
+最后的模n运算）的耗时：
+    with instrument() as stats:
+        sm2.sign(...)
+    print(stats.snapshot())
+计数通过在开启时替换相关函数实现，关闭时恢复原函数，因此关闭状态下点运算没有额外开销；
+阶段计时在sign / verify中只多一次phase_timer调用。统计对整个进程生效，多线程同时运行时计数可能略有出入
+"""
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_active = None  # 当前的Stats，None表示未开启
+_patched = []  # 被替换的函数 [(所属对象, 属性名, 原函数)]
+_lock = threading.Lock()
+
+
+class Stats:
+    """一次统计的结果：调用次数和各阶段耗时"""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.phase_calls = defaultdict(int)
+        self.phase_time = defaultdict(float)
+
+    def add_time(self, phase, seconds):
+        self.phase_calls[phase] += 1
+        self.phase_time[phase] += seconds
+
+    def reset(self):
+        """清零全部计数"""
+        self.counts.clear()
+        self.phase_calls.clear()
+        self.phase_time.clear()
+
+    def snapshot(self):
+        """
+        返回当前统计的副本
+        返回:
+            {'counts': {运算: 次数}, 'phases': {阶段: {'calls', 'total_ms', 'mean_us'}}}
+        """
+        phases = {}
+        for phase, calls in self.phase_calls.items():
+            total = self.phase_time[phase]
+            phases[phase] = {'calls': calls, 'total_ms': total * 1e3, 'mean_us': total / calls * 1e6}
+        return {'counts': dict(self.counts), 'phases': phases}
+
+
+class _PhaseTimer:
+    """按顺序记录一次运算中各阶段的耗时，每次mark把上次mark以来的时间记到该阶段"""
+
+    __slots__ = ('stats', 'prefix', 'last')
+
+    def __init__(self, stats, prefix):
+        self.stats = stats
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.stats.add_time(self.prefix + '.' + phase, now - self.last)
+        self.last = now
+
+
+def phase_timer(prefix):
+    """统计开启时返回阶段计时器，关闭时返回None"""
+    stats = _active
+    return None if stats is None else _PhaseTimer(stats, prefix)
+
+
+def _counting(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = _active
+        if stats is not None:
+            stats.counts[name] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+class _CountingHash:
+    """包装SM3哈希对象，每次digest计一次SM3；copy得到的对象同样计数（KDF每块一次）"""
+
+    __slots__ = ('_h',)
+
+    def __init__(self, h):
+        self._h = h
+
+    def update(self, data):
+        self._h.update(data)
+
+    def copy(self):
+        return _CountingHash(self._h.copy())
+
+    def digest(self):
+        stats = _active
+        if stats is not None:
+            stats.counts['sm3'] += 1
+        return self._h.digest()
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+    def __getattr__(self, attr):
+        # digest_size、block_size等属性（hmac需要）
+        return getattr(self._h, attr)
+
+
+def _counting_sm3(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _CountingHash(func(*args, **kwargs))
+    return wrapper
+
+
+def _targets():
+    """需要计数的函数：(所属对象, 属性名, 计数名称[, 包装函数，默认_counting])"""
+    import SM2
+    import SM2_curve
+    import SM2_field
+    import SM2_signature
+    import SM2_sm3
+
+    targets = [
+        (SM2_curve.CurveEngine, 'jacobian_add_mixed', 'point_add'),
+        (SM2_curve.CurveEngine, 'jacobian_add', 'point_add'),
+        (SM2_curve.CurveEngine, 'point_add', 'point_add'),
+        (SM2_curve.CurveEngine, 'jacobian_double', 'point_double'),
+        (SM2_curve.CurveEngine, 'point_double', 'point_double'),
+        (SM2.SM2, 'mod_inverse', 'mod_inverse'),
+        (SM2_signature.SM2, 'mod_inverse', 'mod_inverse'),
+    ]
+    targets += [(cls, 'inverse', 'mod_inverse') for cls in SM2_field.BACKENDS.values()]
+    # SM3只在sm3_new一层计数（sm3_digest、hmac_sm3都经由SM2_sm3.sm3_new），
+    # 按名称导入了sm3_new的模块中的名称也要替换
+    for module in (SM2_sm3, SM2, SM2_signature):
+        if 'sm3_new' in vars(module):
+            targets.append((module, 'sm3_new', 'sm3', _counting_sm3))
+    return targets
+
+
+def enable(stats=None):
+    """
+    开启统计
+    参数:
+        stats: 继续累加的Stats，为None时新建
+    返回:
+        正在使用的Stats
+    """
+    global _active
+    with _lock:
+        if not _patched:
+            for owner, attr, name, *wrap in _targets():
+                if attr in vars(owner):
+                    original = vars(owner)[attr]
+                    _patched.append((owner, attr, original))
+                    setattr(owner, attr, (wrap[0] if wrap else _counting)(original, name))
+        _active = stats if stats is not None else Stats()
+        return _active
+
+
+def disable():
+    """关闭统计并恢复原函数"""
+    global _active
+    with _lock:
+        _active = None
+        while _patched:
+            owner, attr, original = _patched.pop()
+            setattr(owner, attr, original)
+
+
+def current():
+    """当前的Stats，未开启时返回None"""
+    return _active
+
+
+@contextmanager
+def instrument(stats=None):
+    """在with块内开启统计，退出时恢复之前的状态"""
+    previous = _active
+    stats = enable(stats)
+    try:
+        yield stats
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)